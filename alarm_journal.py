@@ -0,0 +1,264 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# The journal is rewritten once it holds this many more records than there
+# are live alarms
+DEFAULT_COMPACT_THRESHOLD = 1000
+
+# Seconds the writer waits before retrying a failed write
+WRITE_RETRY_DELAY = 1.0
+
+
+class AlarmJournal:
+    """Append-only, durable log of scheduler mutations.
+
+    Every create/modify/snooze/cancel/fired record is appended as one JSON
+    line. A single writer thread batches the records queued while it was
+    busy into one write and one fsync (group commit). The journal also keeps
+    the resulting live alarms, so it can replace itself with a compact
+    snapshot once it has grown enough.
+
+    A failed write is retried until it succeeds. Meanwhile wait_durable
+    returns False, so callers learn their records are not on disk yet.
+    """
+
+    def __init__(self, path: Path, compact_threshold: int = DEFAULT_COMPACT_THRESHOLD):
+        """Initialize the journal.
+
+        Args:
+            path: Journal file, created if it does not exist
+            compact_threshold: Number of records beyond the live alarms that
+                triggers a compaction
+        """
+        self.path = Path(path)
+        self.compact_threshold = compact_threshold
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.alarms: Dict[str, Dict[str, Any]] = {}
+        self.pending: List[str] = []
+        self.appended_seq = 0
+        self.flushed_seq = 0
+        self.record_count = 0
+        # Set while the last write failed, until a write succeeds again
+        self.error: Optional[OSError] = None
+        # Set while the journal may end in a partial line
+        self.torn = False
+        self.running = False
+        self.file = None
+        self.writer_thread: Optional[threading.Thread] = None
+
+    def replay(self) -> Dict[str, Dict[str, Any]]:
+        """Read the journal and start appending to it.
+
+        A torn last line, e.g. from a power loss during a write, is ignored.
+
+        Returns:
+            Dict of alarm_id to the alarm's "trigger_time" and "command"
+        """
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        logger.warning("Skipping corrupt journal record: %r", line)
+                        continue
+                    self._apply(record)
+        logger.info(
+            "Replayed %d journal records, %d alarms active",
+            self.record_count,
+            len(self.alarms),
+        )
+
+        try:
+            self._compact()
+        except OSError as e:
+            # Keep appending to the journal as it is
+            logger.error("Error compacting alarm journal: %s", e, exc_info=True)
+            self.torn = True
+        self.running = True
+        self.writer_thread = threading.Thread(
+            target=self._writer_loop, name="alarm-journal", daemon=True
+        )
+        self.writer_thread.start()
+        return {alarm_id: dict(alarm) for alarm_id, alarm in self.alarms.items()}
+
+    def append(self, op: str, alarm_id: str, **fields) -> int:
+        """Queue a record for writing.
+
+        Args:
+            op: One of "create", "modify", "snooze", "cancel", "fired", "skip"
+            alarm_id: The alarm the record applies to
+            **fields: "trigger_time" and, for "create", "command" and
+                "plugin_list"
+
+        Returns:
+            int: Sequence number to pass to wait_durable
+        """
+        record = {"op": op, "alarm_id": alarm_id, **fields}
+        with self.lock:
+            self._apply(record)
+            self.pending.append(json.dumps(record))
+            self.appended_seq += 1
+            self.changed.notify_all()
+            return self.appended_seq
+
+    def wait_durable(self, seq: int, timeout: Optional[float] = None) -> bool:
+        """Wait until a record has been written and synced to disk.
+
+        Args:
+            seq: Sequence number returned by append
+            timeout: Maximum seconds to wait
+
+        Returns:
+            bool: True if the record is durable, False on timeout or if
+                writing the journal is failing
+        """
+        with self.lock:
+            self.changed.wait_for(
+                lambda: self.flushed_seq >= seq
+                or self.error is not None
+                or not self.running,
+                timeout,
+            )
+            return self.flushed_seq >= seq
+
+    def close(self):
+        """Flush outstanding records and stop the writer thread."""
+        with self.lock:
+            self.running = False
+            self.changed.notify_all()
+        if self.writer_thread is not None:
+            self.writer_thread.join()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _apply(self, record: Dict[str, Any]):
+        """Apply a record to the live alarms. Must be called with lock held."""
+        self.record_count += 1
+        op = record.get("op")
+        alarm_id = record.get("alarm_id")
+        if op == "create":
+            self.alarms[alarm_id] = {
+                "trigger_time": record["trigger_time"],
+                "command": record.get("command", ""),
+                "plugin_list": record.get("plugin_list"),
+            }
+        elif op in ("modify", "snooze"):
+            if alarm_id in self.alarms:
+                self.alarms[alarm_id]["trigger_time"] = record["trigger_time"]
+        elif op in ("cancel", "skip"):
+            self.alarms.pop(alarm_id, None)
+        elif op == "fired":
+            # The alarm may have been created again since it fired
+            alarm = self.alarms.get(alarm_id)
+            if alarm is not None and alarm["trigger_time"] == record["trigger_time"]:
+                del self.alarms[alarm_id]
+
+    def _writer_loop(self):
+        while True:
+            with self.lock:
+                while not self.pending and self.running:
+                    self.changed.wait()
+                if not self.pending:
+                    return
+                batch, self.pending = self.pending, []
+                seq = self.appended_seq
+                # Ends a line torn by a failed write or a power loss
+                lead = "\n" if self.torn else ""
+
+            try:
+                if self.file is None:
+                    self.file = open(self.path, "a", encoding="utf-8")
+                self.file.write(lead + "\n".join(batch) + "\n")
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            except OSError as e:
+                logger.error("Error writing alarm journal: %s", e, exc_info=True)
+                with self.lock:
+                    self.error = e
+                    self.torn = True
+                    self.pending = batch + self.pending
+                    self.changed.notify_all()
+                    if not self.running:
+                        logger.error(
+                            "Dropping %d unwritten journal records", len(self.pending)
+                        )
+                        return
+                    self.changed.wait(WRITE_RETRY_DELAY)
+                continue
+
+            with self.lock:
+                if self.error is not None:
+                    logger.info("Writing alarm journal again")
+                self.error = None
+                self.torn = False
+                self.flushed_seq = seq
+                self.changed.notify_all()
+                compact = self.record_count - len(self.alarms) > self.compact_threshold
+            if compact:
+                try:
+                    self._compact()
+                except OSError as e:
+                    logger.error("Error compacting alarm journal: %s", e, exc_info=True)
+
+    def _compact(self):
+        """Replace the journal with a snapshot of the live alarms.
+
+        Called before the writer starts, or by the writer. The snapshot is
+        written without holding lock; records appended meanwhile are still
+        pending and are written to the new journal afterwards.
+
+        Raises:
+            OSError: If the snapshot cannot be written. The journal is then
+                left as it was.
+        """
+        with self.lock:
+            alarms = [
+                {"op": "create", "alarm_id": alarm_id, **alarm}
+                for alarm_id, alarm in self.alarms.items()
+            ]
+            record_count = self.record_count
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in alarms:
+                f.write(json.dumps(record))
+                f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        try:
+            os.replace(tmp_path, self.path)
+        finally:
+            self.file = open(self.path, "a", encoding="utf-8")
+        _fsync_dir(self.path.parent)
+        with self.lock:
+            logger.debug(
+                "Compacted journal from %d to %d records", record_count, len(alarms)
+            )
+            self.record_count -= record_count - len(alarms)
+
+
+def _fsync_dir(directory: Path):
+    """Make a rename in a directory durable, where the platform supports it."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,75 @@
+"""Benchmark cold-start import time of the ulticlock modules.
+
+Imports each module in a fresh interpreter with -X importtime and prints
+the median cumulative import time over several runs. Also checks that
+importing ulticlock leaves the HTTP and iCalendar libraries unloaded, so
+reading the next stored alarm at boot doesn't wait for them.
+
+    python bench_import_time.py --runs 10
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+MODULES = ["ulticlock", "log_config", "sqlManager", "ical_manager"]
+
+# Only needed once a sync starts
+DEFERRED_MODULES = ["requests", "urllib3", "icalendar", "recurring_ical_events"]
+
+
+def import_time(module):
+    """Import a module in a fresh interpreter.
+
+    Returns:
+        float: Cumulative import time of the module in milliseconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import %s" % module],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Lines look like "import time: self [us] | cumulative | imported package"
+    for line in reversed(result.stderr.splitlines()):
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+    raise RuntimeError("no import time reported for %s" % module)
+
+
+def loaded_after(module, candidates):
+    """Get which of candidates are in sys.modules after importing module."""
+    code = "import sys, %s; print(' '.join(m for m in %r if m in sys.modules))" % (
+        module,
+        candidates,
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        times = [import_time(module) for _ in range(args.runs)]
+        print(
+            "%-14s n=%-3d median=%7.1fms min=%7.1fms max=%7.1fms"
+            % (module, len(times), statistics.median(times), min(times), max(times))
+        )
+
+    loaded = loaded_after("ulticlock", DEFERRED_MODULES)
+    if loaded:
+        print("import ulticlock also loads: %s" % ", ".join(loaded))
+        sys.exit(1)
+    print("import ulticlock defers: %s" % ", ".join(DEFERRED_MODULES))
+
+
+if __name__ == "__main__":
+    main()
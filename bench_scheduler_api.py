@@ -0,0 +1,130 @@
+"""Benchmark the scheduler API under concurrent snooze and status load.
+
+Starts a scheduler in-process on a free port, schedules some alarms, then
+has several client threads hammer it with snooze and status calls while a
+few connections sit stalled mid-request. Prints latency percentiles per
+call type.
+
+    python bench_scheduler_api.py --clients 8 --requests 200 --stalled 4
+"""
+
+import argparse
+import logging
+import random
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from scheduler_python import (
+    AlarmSchedulerPython,
+    DEFAULT_MAX_REQUESTS,
+    TIME_SPEC_FORMAT,
+)
+from scheduler_python_client import AlarmSchedulerPythonClient
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def run_client(port, alarm_ids, requests, latencies, lock):
+    client = AlarmSchedulerPythonClient(port=port)
+    local = {"snooze": [], "status": []}
+    for _ in range(requests):
+        alarm_id = random.choice(alarm_ids)
+        if random.random() < 0.5:
+            client.snooze_alarm(alarm_id, 3600)
+            local["snooze"].append(client.last_latency)
+        else:
+            client.get_alarm_status(alarm_id)
+            local["status"].append(client.last_latency)
+    client.close()
+    with lock:
+        for name, values in local.items():
+            latencies[name].extend(values)
+
+
+def stall_connection(port):
+    """Open a connection and send half a request, then go silent."""
+    sock = socket.create_connection(("localhost", port))
+    sock.sendall(b"POST /snooze HTTP/1.1\r\nHost: localhost\r\n")
+    return sock
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--alarms", type=int, default=100)
+    parser.add_argument("--stalled", type=int, default=4)
+    parser.add_argument("--max-requests", type=int, default=DEFAULT_MAX_REQUESTS)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_scheduler_"))
+    (work_dir / "plugins").mkdir()
+    scheduler = AlarmSchedulerPython(
+        port=0,
+        plugins_dir=work_dir / "plugins",
+        journal_path=work_dir / "journal.jsonl",
+        max_requests=args.max_requests,
+    )
+    port = scheduler.server.server_address[1]
+
+    alarm_ids = ["bench-%d" % i for i in range(args.alarms)]
+    time_spec = (datetime.now() + timedelta(hours=1)).strftime(TIME_SPEC_FORMAT)
+    AlarmSchedulerPythonClient(port=port).apply_batch(
+        [
+            {"op": "create", "alarm_id": a, "time_spec": time_spec, "command": ""}
+            for a in alarm_ids
+        ]
+    )
+
+    stalled = [stall_connection(port) for _ in range(args.stalled)]
+    latencies = {"snooze": [], "status": []}
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(
+            target=run_client, args=(port, alarm_ids, args.requests, latencies, lock)
+        )
+        for _ in range(args.clients)
+    ]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    total = sum(len(values) for values in latencies.values())
+    print(
+        "%d clients, %d requests, %d stalled connections: %.2fs, %.0f req/s"
+        % (args.clients, total, args.stalled, elapsed, total / elapsed)
+    )
+    for name, values in latencies.items():
+        ms = [v * 1000 for v in values]
+        print(
+            "%-6s n=%-5d p50=%6.2fms p95=%6.2fms p99=%6.2fms max=%6.2fms"
+            % (
+                name,
+                len(ms),
+                statistics.median(ms),
+                percentile(ms, 95),
+                percentile(ms, 99),
+                max(ms),
+            )
+        )
+
+    for sock in stalled:
+        sock.close()
+    scheduler.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import json
+import logging
+import os
+import re
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from event import Event
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+class CalendarCache:
+    """On-disk fetch cache for a single calendar.
+
+    Keeps the HTTP validators (ETag/Last-Modified), a hash of the last
+    downloaded body, the alarm components filtered from it and the events
+    parsed from those, so an unchanged calendar does not have to be
+    downloaded or reparsed. The occurrences of each event series are kept
+    as well, so a changed calendar only re-expands the series that changed.
+    """
+
+    def __init__(self, cache_dir: str, calendar_name: str) -> None:
+        """Initialize the cache for one calendar.
+
+        Args:
+            cache_dir: Directory holding the cache files
+            calendar_name: Name of the calendar, used to build the file names
+        """
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", calendar_name) or "calendar"
+        self.cache_dir: Path = Path(cache_dir)
+        self.meta_file: Path = self.cache_dir / ("%s.json" % safe_name)
+        self.body_file: Path = self.cache_dir / ("%s.ics" % safe_name)
+        self.meta: Dict[str, Any] = self._load_meta()
+
+    def _load_meta(self) -> Dict[str, Any]:
+        if not self.meta_file.exists():
+            return {}
+        try:
+            with open(self.meta_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable calendar cache %s", self.meta_file)
+            return {}
+
+    def conditional_headers(self, keyword: str) -> Dict[str, str]:
+        """Get the validator headers for a conditional GET.
+
+        Args:
+            keyword: Current alarm keyword. The cached body was filtered with
+                the keyword of its sync, so validators are only sent if it
+                has not changed since.
+
+        Returns:
+            dict: If-None-Match/If-Modified-Since headers, empty if unknown
+        """
+        headers = {}
+        if not self.body_file.exists() or self.meta.get("keyword") != keyword:
+            return headers
+        if self.meta.get("etag"):
+            headers["If-None-Match"] = self.meta["etag"]
+        if self.meta.get("last_modified"):
+            headers["If-Modified-Since"] = self.meta["last_modified"]
+        return headers
+
+    @property
+    def content_hash(self) -> Optional[str]:
+        return self.meta.get("content_hash")
+
+    def read_body(self) -> Optional[str]:
+        """Read the alarm components of the last downloaded calendar body.
+
+        Returns:
+            str: The cached components, or None if there is none
+        """
+        try:
+            with open(self.body_file, "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def get_events(
+        self, horizon: Optional[datetime], keyword: str
+    ) -> Optional[List[Event]]:
+        """Get the cached events if they still cover the requested horizon.
+
+        Args:
+            horizon: The latest instant the caller needs events for, or None
+                to accept whatever is cached
+            keyword: Alarm keyword the events must have been filtered with
+
+        Returns:
+            list: Cached events, or None if the cache cannot be used
+        """
+        if "events" not in self.meta or self.meta.get("keyword") != keyword:
+            return None
+        if (
+            horizon is not None
+            and datetime.fromisoformat(self.meta["horizon"]) < horizon
+        ):
+            return None
+        return [_event_from_json(e) for e in self.meta["events"]]
+
+    def get_expansions(self) -> Tuple[Optional[str], Dict[str, Dict[str, Any]]]:
+        """Get the cached occurrences of each event series.
+
+        Returns:
+            tuple: The context the series were expanded in and a dict
+                mapping each UID to its "key", expansion "end" and "events"
+        """
+        expansions = self.meta.get("expansions")
+        if not expansions:
+            return None, {}
+        return expansions["context"], {
+            uid: {
+                "key": group["key"],
+                "end": datetime.fromisoformat(group["end"]),
+                "events": [_event_from_json(e) for e in group["events"]],
+            }
+            for uid, group in expansions["groups"].items()
+        }
+
+    def update_validators(
+        self, etag: Optional[str], last_modified: Optional[str]
+    ) -> None:
+        """Record new validators for an unchanged body.
+
+        Args:
+            etag: ETag response header, if any
+            last_modified: Last-Modified response header, if any
+        """
+        if (etag, last_modified) == (
+            self.meta.get("etag"),
+            self.meta.get("last_modified"),
+        ):
+            return
+        self.meta["etag"] = etag
+        self.meta["last_modified"] = last_modified
+        self._write(None)
+
+    def store(
+        self,
+        body: Optional[str],
+        content_hash: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        keyword: str,
+        horizon: datetime,
+        events: List[Event],
+        expansion_context: Optional[str] = None,
+        expansions: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        """Persist a freshly parsed calendar.
+
+        Args:
+            body: Filtered alarm components, or None to keep the cached ones
+            content_hash: Hash of the downloaded body
+            etag: ETag response header, if any
+            last_modified: Last-Modified response header, if any
+            keyword: Alarm keyword the events were filtered with
+            horizon: The latest instant the events were expanded up to
+            events: The parsed events
+            expansion_context: Context the series were expanded in, see
+                get_expansions
+            expansions: Occurrences of each event series, see get_expansions
+        """
+        self.meta = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": content_hash,
+            "keyword": keyword,
+            "horizon": horizon.isoformat(),
+            "events": [_event_to_json(e) for e in events],
+        }
+        if expansions is not None:
+            self.meta["expansions"] = {
+                "context": expansion_context,
+                "groups": {
+                    uid: {
+                        "key": group["key"],
+                        "end": group["end"].isoformat(),
+                        "events": [_event_to_json(e) for e in group["events"]],
+                    }
+                    for uid, group in expansions.items()
+                },
+            }
+        self._write(body)
+
+    def _write(self, body: Optional[str]) -> None:
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if body is not None:
+                _atomic_write(self.body_file, body)
+            _atomic_write(self.meta_file, json.dumps(self.meta))
+        except OSError:
+            logger.warning("Unable to write calendar cache %s", self.meta_file)
+            logger.debug("Full cache write error:", exc_info=True)
+
+
+def _atomic_write(path: Path, data: str) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _event_to_json(event: Event) -> Dict[str, Any]:
+    return {
+        "date": event.date.isoformat(),
+        "start_time": event.start_time.isoformat(),
+        "end_time": event.end_time.isoformat(),
+        "title": event.title,
+        "event_id": event.event_id,
+        "is_system_managed": event.is_system_managed,
+        "timezone": event.timezone.zone,
+    }
+
+
+def _event_from_json(data: Dict[str, Any]) -> Event:
+    return Event(
+        date_val=date.fromisoformat(data["date"]),
+        start_time=time.fromisoformat(data["start_time"]),
+        end_time=time.fromisoformat(data["end_time"]),
+        title=data["title"],
+        event_id=data["event_id"],
+        is_system_managed=data["is_system_managed"],
+        timezone=data["timezone"],
+    )
@@ -1,4 +1,5 @@
 from datetime import date, time, datetime
+from functools import lru_cache
 import logging
 from typing import Optional
 import pytz
@@ -6,9 +7,33 @@ import pytz
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def get_timezone(name: str) -> pytz.BaseTzInfo:
+    """Get a pytz timezone, shared by every event in the process.
+
+    Args:
+        name: The timezone name, e.g. "America/Denver"
+
+    Returns:
+        pytz.BaseTzInfo: The timezone
+    """
+    return pytz.timezone(name)
+
+
 class Event:
     """Class representing a calendar event with alarm functionality."""
 
+    __slots__ = (
+        "date",
+        "start_time",
+        "end_time",
+        "title",
+        "event_id",
+        "is_system_managed",
+        "timezone",
+        "start_timestamp",
+    )
+
     def __init__(
         self,
         date_val: date,
@@ -36,16 +61,9 @@ class Event:
         self.title: str = title
         self.event_id: str = event_id
         self.is_system_managed: bool = is_system_managed
-        self.timezone: pytz.timezone = pytz.timezone(timezone)
-
-        logger.debug(
-            "Created event %s: date=%s, start=%s, end=%s, title=%s",
-            event_id,
-            date_val,
-            start_time,
-            end_time,
-            title,
-        )
+        self.timezone: pytz.timezone = get_timezone(timezone)
+        # Start instant in seconds since the epoch, used as the sort key
+        self.start_timestamp: float = self.get_start_datetime().timestamp()
 
     @classmethod
     def from_dict(cls, event_dict: dict, timezone: str = "America/Denver") -> "Event":
@@ -140,4 +158,36 @@ class Event:
         Returns:
             bool: True if this event should sort before the other
         """
-        return self.get_start_datetime() < other.get_start_datetime()
+        return self.start_timestamp < other.start_timestamp
+
+    def _key(self) -> tuple:
+        return (
+            self.event_id,
+            self.date,
+            self.start_time,
+            self.end_time,
+            self.title,
+            self.is_system_managed,
+            self.timezone.zone,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        """Compare events field by field.
+
+        Args:
+            other: Object to compare with
+
+        Returns:
+            bool: True if both events have the same fields
+        """
+        if not isinstance(other, Event):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        """Hash the event consistently with __eq__.
+
+        Returns:
+            int: Hash of the event id and start instant
+        """
+        return hash((self.event_id, self.start_timestamp))
@@ -1,4 +1,8 @@
+import codecs
 import datetime
+import hashlib
+import heapq
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 import requests
 import recurring_ical_events
 from icalendar import Calendar
@@ -8,12 +12,15 @@ from requests.auth import HTTPBasicAuth
 import urllib3
 import logging
 import pytz
+import re
 from datetime import timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from event import Event
+from calendar_cache import CalendarCache
+from ics_filter import filter_alarm_components
 
-# Disable logging warnings when user is not using cert check
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# Disable urllib3's warnings, e.g. when user is not using cert check
+urllib3.disable_warnings()
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
@@ -22,6 +29,40 @@ logger = logging.getLogger(__name__)
 UTC_TZ = pytz.utc
 MTN_TZ = pytz.timezone("America/Denver")  # Mountain Time
 
+# Days ahead of now that alarms are synced for
+DEFAULT_SYNC_WINDOW_DAYS = 7
+
+# Parsed events are expanded this far past the sync window so that cached
+# results stay usable while the window slides forward between syncs
+CACHE_HORIZON_SLACK = timedelta(days=1)
+
+# Safety margin around the sync window when pruning components before
+# expansion. Covers floating and all-day events whose zone is only known
+# once they are expanded.
+PRUNE_MARGIN = timedelta(days=1)
+
+# Upper bound of the gap between two occurrences of a COUNT limited rule
+# without BYxxx parts. MONTHLY and YEARLY are only exact when every period
+# has the DTSTART day, see _series_bounds.
+FREQ_PERIODS = {
+    "SECONDLY": timedelta(seconds=1),
+    "MINUTELY": timedelta(minutes=1),
+    "HOURLY": timedelta(hours=1),
+    "DAILY": timedelta(days=1),
+    "WEEKLY": timedelta(weeks=1),
+    "MONTHLY": timedelta(days=31),
+    "YEARLY": timedelta(days=366),
+}
+
+# Read size used while streaming calendar bodies
+STREAM_CHUNK_SIZE = 64 * 1024
+
+CHARSET_PARAM = re.compile(r'charset="?([^";\s]+)', re.IGNORECASE)
+
+# Defaults for fetching several calendars at once
+DEFAULT_FETCH_TIMEOUT = 30  # seconds, per calendar
+DEFAULT_MAX_CONCURRENT_FETCHES = 4
+
 # Type aliases
 CalendarDict = Dict[str, str]
 
@@ -31,12 +72,103 @@ class IcalManager:
         self.calendar: CalendarDict = calendar_obj
         self.events: List[Event] = []
         self.config: JsonConfig = config
+        self.cache: CalendarCache = CalendarCache(
+            getattr(config, "cache_dir", "./cache"), calendar_obj["name"]
+        )
+        self.timeout: float = calendar_obj.get(
+            "timeout", getattr(config, "fetch_timeout", DEFAULT_FETCH_TIMEOUT)
+        )
+        # Reused across syncs so the daemon keeps its connection alive
+        self.session: requests.Session = requests.Session()
+        # Syncs in a row this calendar could not be fetched, see
+        # fetch_all_calendars
+        self.consecutive_failures: int = 0
+        # Fetch started by fetch_all_calendars, which may outlive its sync
+        self.fetch_future: Optional[Future] = None
+        self.window: timedelta = timedelta(
+            days=getattr(config, "sync_window_days", DEFAULT_SYNC_WINDOW_DAYS)
+        )
+        # Occurrences of each event series by UID, see _parse_events
+        self.expansion_context: Optional[str]
+        self.expansions: Dict[str, Dict[str, Any]]
+        self.expansion_context, self.expansions = self.cache.get_expansions()
 
     def fetch_and_parse_events(self) -> List[Event]:
         logger.info("Attempting to fetch calendar: %s", self.calendar["name"])
         logger.debug("Calendar URL: %s", self.calendar["ical_url"])
         logger.debug("Verify cert: %s", self.calendar["verify_cert"])
 
+        keyword = self.config.alarm_keyword
+        response = self._download(keyword)
+
+        # Get current time in Mountain Time
+        today_mtn = datetime.datetime.now(MTN_TZ)
+        next_week_end_mtn = today_mtn + self.window
+
+        # Convert to UTC for comparison with iCal dates
+        today_utc = today_mtn.astimezone(UTC_TZ)
+        next_week_end_utc = next_week_end_mtn.astimezone(UTC_TZ)
+        horizon_utc = next_week_end_utc + CACHE_HORIZON_SLACK
+
+        try:
+            if response.status_code == 304:
+                logger.info("Calendar %s not modified", self.calendar["name"])
+                events = self._cached_events(next_week_end_utc, keyword)
+                if events is None:
+                    events = self._parse_events(
+                        self.cache.read_body(),
+                        today_utc,
+                        next_week_end_utc,
+                        horizon_utc,
+                    )
+                    self._store_cache(
+                        None, self.cache.content_hash, response, horizon_utc, events
+                    )
+            elif response.status_code == 200:
+                # Only the alarm events are kept from the streamed body
+                ical_data, content_hash = filter_alarm_components(
+                    response.iter_lines(chunk_size=STREAM_CHUNK_SIZE),
+                    keyword,
+                    _charset(response),
+                )
+                events = None
+                if content_hash == self.cache.content_hash:
+                    logger.info("Calendar %s content unchanged", self.calendar["name"])
+                    events = self._cached_events(next_week_end_utc, keyword)
+                if events is None:
+                    events = self._parse_events(
+                        ical_data, today_utc, next_week_end_utc, horizon_utc
+                    )
+                    self._store_cache(
+                        ical_data, content_hash, response, horizon_utc, events
+                    )
+                else:
+                    # Same content, but the server may have sent new validators
+                    self.cache.update_validators(
+                        response.headers.get("ETag"),
+                        response.headers.get("Last-Modified"),
+                    )
+            else:
+                raise Exception(
+                    "Failed to fetch iCalendar data: Status Code %s"
+                    % response.status_code
+                )
+        finally:
+            response.close()
+
+        self.events = [e for e in events if _overlaps(e, today_utc, next_week_end_utc)]
+
+        # Sort the events by start time
+        self.events.sort()
+
+        return self.events
+
+    def _download(self, keyword: str) -> requests.Response:
+        """Start streaming the calendar, sending cached validators if we have any."""
+        headers = self.cache.conditional_headers(keyword)
+        if headers:
+            logger.debug("Conditional request headers: %s", headers)
+
         auth = False
         if len(self.calendar["password"]) > 0:
             auth = True
@@ -46,16 +178,23 @@ class IcalManager:
                     "Using basic auth with username: %s", self.calendar["user_name"]
                 )
                 logger.debug("SSL verification: %s", self.calendar["verify_cert"])
-                response = requests.get(
+                return self.session.get(
                     self.calendar["ical_url"],
                     auth=HTTPBasicAuth(
                         self.calendar["user_name"], self.calendar["password"]
                     ),
                     verify=self.calendar["verify_cert"],
+                    headers=headers,
+                    timeout=self.timeout,
+                    stream=True,
                 )
             else:
-                response = requests.get(
-                    self.calendar["ical_url"], verify=self.calendar["verify_cert"]
+                return self.session.get(
+                    self.calendar["ical_url"],
+                    verify=self.calendar["verify_cert"],
+                    headers=headers,
+                    timeout=self.timeout,
+                    stream=True,
                 )
         except requests.exceptions.ConnectionError as e:
             logger.error("Connection failed to %s", self.calendar["ical_url"])
@@ -78,30 +217,138 @@ class IcalManager:
             logger.error("Unexpected error fetching calendar: %s", e, exc_info=True)
             raise
 
-        if response.status_code != 200:
+    def close(self) -> None:
+        """Close the HTTP session."""
+        self.session.close()
+
+    def last_known_events(self) -> List[Event]:
+        """Get the cached events of the last successful sync.
+
+        Used as a fallback when the calendar cannot be reached.
+
+        Returns:
+            list: Cached events overlapping the sync window, sorted
+        """
+        events = self.cache.get_events(None, self.config.alarm_keyword) or []
+        today_utc = datetime.datetime.now(UTC_TZ)
+        next_week_end_utc = today_utc + self.window
+        events = [e for e in events if _overlaps(e, today_utc, next_week_end_utc)]
+        events.sort()
+        return events
+
+    def _cached_events(
+        self, window_end: datetime.datetime, keyword: str
+    ) -> Optional[List[Event]]:
+        events = self.cache.get_events(window_end, keyword)
+        if events is not None:
+            logger.debug("Reusing %d cached events", len(events))
+        return events
+
+    def _store_cache(
+        self,
+        body: Optional[str],
+        content_hash: Optional[str],
+        response: requests.Response,
+        horizon: datetime.datetime,
+        events: List[Event],
+    ) -> None:
+        self.cache.store(
+            body,
+            content_hash,
+            response.headers.get("ETag", self.cache.meta.get("etag")),
+            response.headers.get("Last-Modified", self.cache.meta.get("last_modified")),
+            self.config.alarm_keyword,
+            horizon,
+            events,
+            self.expansion_context,
+            self.expansions,
+        )
+
+    def _parse_events(
+        self,
+        ical_data: Optional[str],
+        start: datetime.datetime,
+        end: datetime.datetime,
+        horizon: datetime.datetime,
+    ) -> List[Event]:
+        """Parse the calendar and expand alarm events between start and horizon.
+
+        Events are expanded per series: a recurring event together with its
+        overridden occurrences, sharing one UID. A series whose components
+        have the same RECURRENCE-ID, SEQUENCE and LAST-MODIFIED as in the
+        last sync reuses its cached occurrences. Only once they no longer
+        reach end, the series is expanded from where they stop to horizon.
+        """
+        if ical_data is None:
             raise Exception(
-                "Failed to fetch iCalendar data: Status Code %s" % response.status_code
+                "Calendar %s was not modified but no cached copy exists"
+                % self.calendar["name"]
             )
 
-        # Initialize the list to store the events
-        self.events = []
-
-        # Parse the iCalendar data
-        ical_data = response.text
+        # Parse the alarm components left over from filtering
         cal = Calendar.from_ical(ical_data)
+        _prune_components(cal, start, horizon)
 
-        # Get current time in Mountain Time
-        today_mtn = datetime.datetime.now(MTN_TZ)
-        next_week_end_mtn = today_mtn + timedelta(days=7)
+        # Occurrences depend on the time zones and keyword, not only on the
+        # series themselves
+        timezones = [c for c in cal.subcomponents if c.name == "VTIMEZONE"]
+        context = hashlib.sha1(
+            b"".join(tz.to_ical() for tz in timezones)
+            + ("\0%s\0%s" % (self.config.alarm_keyword, self.config.timezone)).encode()
+        ).hexdigest()
+        if context != self.expansion_context:
+            self.expansion_context = context
+            self.expansions = {}
 
-        # Convert to UTC for comparison with iCal dates
-        today_utc = today_mtn.astimezone(UTC_TZ)
-        next_week_end_utc = next_week_end_mtn.astimezone(UTC_TZ)
+        events = []
+        expansions = {}
+        expanded = 0
+        for uid, components in _group_components(cal).items():
+            key = _expansion_key(components)
+            group = self.expansions.get(uid)
+            if group is None or group["key"] != key:
+                group = {"key": key, "end": start, "events": []}
+            if group["end"] < end:
+                expanded += 1
+                # Drop occurrences that ended before the window
+                kept = [e for e in group["events"] if _overlaps(e, start, group["end"])]
+                seen = {(e.event_id, e.start_timestamp) for e in kept}
+                # Occurrences spanning the old end are expanded again
+                for event in self._expand(
+                    timezones, components, max(start, group["end"]), horizon
+                ):
+                    if (event.event_id, event.start_timestamp) not in seen:
+                        kept.append(event)
+                group = {"key": key, "end": horizon, "events": kept}
+            expansions[uid] = group
+            events.extend(group["events"])
+
+        # Series no longer in the calendar are forgotten
+        self.expansions = expansions
+        logger.info(
+            "Expanded %d of %d event series in %s",
+            expanded,
+            len(expansions),
+            self.calendar["name"],
+        )
+        return events
+
+    def _expand(
+        self,
+        timezones: List[Any],
+        components: List[Any],
+        start: datetime.datetime,
+        end: datetime.datetime,
+    ) -> List[Event]:
+        """Expand the alarm occurrences of one event series."""
+        # Initialize the list to store the events
+        events = []
+
+        cal = Calendar()
+        cal.subcomponents = timezones + components
 
         # Process events with timezone conversion
-        for event in recurring_ical_events.of(cal).between(
-            today_utc, next_week_end_utc
-        ):
+        for event in recurring_ical_events.of(cal).between(start, end):
             dtstart = event["DTSTART"].dt
             dtend = event["DTEND"].dt
 
@@ -116,18 +363,238 @@ class IcalManager:
                 event_obj = Event(
                     date_val=dtstart_mtn.date(),
                     start_time=dtstart_mtn.time(),
-                    end_time=dtend.astimezone(MTN_TZ).time()
-                    if dtend.tzinfo
-                    else MTN_TZ.localize(dtend).time(),
+                    end_time=(
+                        dtend.astimezone(MTN_TZ).time()
+                        if dtend.tzinfo
+                        else MTN_TZ.localize(dtend).time()
+                    ),
                     title=event["SUMMARY"],
                     event_id="%s:%s"
                     % (event.get("UID"), dtstart_mtn.strftime("%m-%d")),
                     is_system_managed=False,
                     timezone=self.config.timezone,
                 )
-                self.events.append(event_obj)
+                events.append(event_obj)
 
-        # Sort the events by start time
-        self.events.sort()
+        return events
 
-        return self.events
+
+def _charset(response: requests.Response) -> str:
+    """Get the charset the server declared, UTF-8 per RFC 5545 if none.
+
+    Not response.encoding, which falls back to ISO-8859-1 for text/*.
+    """
+    match = CHARSET_PARAM.search(response.headers.get("Content-Type", ""))
+    if match is None:
+        return "utf-8"
+    try:
+        return codecs.lookup(match.group(1)).name
+    except LookupError:
+        logger.warning("Unknown charset %s, using UTF-8", match.group(1))
+        return "utf-8"
+
+
+def _overlaps(event: Event, start: datetime.datetime, end: datetime.datetime) -> bool:
+    """Check whether an event overlaps the window between start and end."""
+    event_start = event.start_timestamp
+    if event_start >= end.timestamp():
+        return False
+    if event_start >= start.timestamp():
+        return True
+    event_end = event.get_end_datetime().timestamp()
+    if event_end < event_start:  # Ends after midnight
+        event_end += 86400
+    return event_end > start.timestamp()
+
+
+def _prune_components(
+    cal: Calendar, start: datetime.datetime, end: datetime.datetime
+) -> None:
+    """Drop events that cannot produce an occurrence between start and end.
+
+    Removes one-off events outside the window and recurring series that
+    ended before it or begin after it, so expansion cost depends on the
+    window instead of the calendar's history.
+    """
+    window_start = start - PRUNE_MARGIN
+    window_end = end + PRUNE_MARGIN
+    kept = []
+    pruned = 0
+    for component in cal.subcomponents:
+        if component.name == "VEVENT":
+            first_start, last_end = _series_bounds(component)
+            if first_start is not None and (
+                first_start > window_end
+                or (last_end is not None and last_end < window_start)
+            ):
+                pruned += 1
+                continue
+        kept.append(component)
+    cal.subcomponents = kept
+    logger.debug("Pruned %d events outside the sync window", pruned)
+
+
+def _series_bounds(component) -> Tuple[Optional[datetime.datetime], ...]:
+    """Get the earliest start and latest end of an event or series in UTC.
+
+    Returns:
+        tuple: (first start, last end). The first start is None if it cannot
+            be determined, the last end is None for unbounded series.
+    """
+    if "DTSTART" not in component:
+        return None, None
+    dtstart = component["DTSTART"].dt
+    series_start = _as_utc(dtstart)
+    first_start = series_start
+    if "DTEND" in component:
+        duration = _as_utc(component["DTEND"].dt) - series_start
+    elif "DURATION" in component:
+        duration = component["DURATION"].dt
+    elif isinstance(dtstart, datetime.datetime):
+        duration = timedelta(0)
+    else:
+        duration = timedelta(days=1)
+    last_start = first_start
+
+    # An override can move an occurrence in or out of the window
+    if "RECURRENCE-ID" in component:
+        recurrence_id = _as_utc(component["RECURRENCE-ID"].dt)
+        first_start = min(first_start, recurrence_id)
+        last_start = max(last_start, recurrence_id)
+
+    rdates = component.get("RDATE", [])
+    for rdate in rdates if isinstance(rdates, list) else [rdates]:
+        for period in rdate.dts:
+            value = period.dt[0] if isinstance(period.dt, tuple) else period.dt
+            first_start = min(first_start, _as_utc(value))
+            last_start = max(last_start, _as_utc(value))
+
+    rrules = component.get("RRULE", [])
+    for rrule in rrules if isinstance(rrules, list) else [rrules]:
+        if "UNTIL" in rrule:
+            last_start = max(last_start, _as_utc(rrule["UNTIL"][0]))
+            continue
+        period = FREQ_PERIODS.get(rrule.get("FREQ", [""])[0])
+        exact = period is not None and not any(key.startswith("BY") for key in rrule)
+        if rrule.get("FREQ") == ["MONTHLY"]:
+            exact = exact and dtstart.day <= 28
+        elif rrule.get("FREQ") == ["YEARLY"]:
+            exact = exact and (dtstart.month, dtstart.day) != (2, 29)
+        if "COUNT" not in rrule or not exact:
+            return first_start, None
+        interval = rrule.get("INTERVAL", [1])[0]
+        # Counted from DTSTART, RDATEs and overrides don't move the rule
+        last_start = max(
+            last_start, series_start + period * interval * rrule["COUNT"][0]
+        )
+
+    return first_start, last_start + duration
+
+
+def _group_components(cal: Calendar) -> Dict[str, List[Any]]:
+    """Group the events of a calendar into series by UID."""
+    groups: Dict[str, List[Any]] = {}
+    for component in cal.subcomponents:
+        if component.name == "VEVENT":
+            groups.setdefault(str(component.get("UID", "")), []).append(component)
+    return groups
+
+
+def _expansion_key(components: List[Any]) -> List[List[Any]]:
+    """Get what identifies the version of an event series.
+
+    Each component is identified by its RECURRENCE-ID, SEQUENCE and
+    LAST-MODIFIED. Components without LAST-MODIFIED fall back to a hash of
+    their content, since SEQUENCE alone is not bumped on every change.
+
+    Returns:
+        list: JSON serializable key, equal for unchanged series
+    """
+    key = []
+    for component in components:
+        recurrence_id = (
+            _as_utc(component["RECURRENCE-ID"].dt).isoformat()
+            if "RECURRENCE-ID" in component
+            else ""
+        )
+        if "LAST-MODIFIED" in component:
+            version = _as_utc(component["LAST-MODIFIED"].dt).isoformat()
+        else:
+            version = hashlib.sha1(component.to_ical()).hexdigest()
+        key.append([recurrence_id, int(component.get("SEQUENCE", 0)), version])
+    key.sort()
+    return key
+
+
+def _as_utc(value) -> datetime.datetime:
+    """Convert an iCalendar date or datetime to UTC, floating as Mountain Time."""
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    if value.tzinfo is None:
+        value = MTN_TZ.localize(value)
+    return value.astimezone(UTC_TZ)
+
+
+def fetch_all_calendars(managers: List[IcalManager], config: JsonConfig) -> List[Event]:
+    """Fetch several calendars concurrently and merge their events.
+
+    Each calendar is fetched on a bounded thread pool. A calendar that fails
+    or does not answer in time falls back to its last cached events, so one
+    dead server neither holds up nor wipes out the others. A fetch that
+    timed out keeps running in the background; its calendar is not fetched
+    again until it has finished, so two fetches never share a manager.
+
+    Args:
+        managers: One IcalManager per calendar
+        config: Application config (max_concurrent_fetches, fetch_timeout)
+
+    Returns:
+        list: Events of all calendars, sorted by start time
+    """
+    if not managers:
+        return []
+
+    max_workers = getattr(
+        config, "max_concurrent_fetches", DEFAULT_MAX_CONCURRENT_FETCHES
+    )
+    busy = [
+        manager
+        for manager in managers
+        if manager.fetch_future is not None and not manager.fetch_future.done()
+    ]
+    idle = [manager for manager in managers if manager not in busy]
+    not_done = set()
+    if idle:
+        executor = ThreadPoolExecutor(
+            max_workers=min(max_workers, len(idle)),
+            thread_name_prefix="calendar-fetch",
+        )
+        for manager in idle:
+            manager.fetch_future = executor.submit(manager.fetch_and_parse_events)
+        # Calendars queued behind a full pool get their own timeout on top
+        rounds = -(-len(idle) // max_workers)
+        deadline = rounds * max(manager.timeout for manager in idle)
+        _, not_done = wait([manager.fetch_future for manager in idle], timeout=deadline)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for manager in managers:
+        name = manager.calendar["name"]
+        future = manager.fetch_future
+        if manager in busy:
+            logger.error("Previous fetch of calendar %s still running", name)
+        elif future in not_done:
+            logger.error("Timed out fetching calendar %s", name)
+        elif future.exception() is not None:
+            logger.error("Failed to fetch calendar %s: %s", name, future.exception())
+        else:
+            manager.consecutive_failures = 0
+            results.append(future.result())
+            continue
+        manager.consecutive_failures += 1
+        events = manager.last_known_events()
+        logger.warning("Using %d cached events for calendar %s", len(events), name)
+        results.append(events)
+
+    # Each calendar's events are already sorted, so a k-way merge is enough
+    return list(heapq.merge(*results))
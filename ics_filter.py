@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import re
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+TZID_PARAM = re.compile(r';TZID=("[^"]*"|[^;:]*)', re.IGNORECASE)
+
+
+def filter_alarm_components(
+    lines: Iterable[bytes], keyword: str, encoding: str = "utf-8"
+) -> Tuple[str, str]:
+    """Reduce a streamed iCalendar body to the components alarms can come from.
+
+    The body is scanned line by line without building a Calendar object.
+    A VEVENT is kept when its SUMMARY starts with the alarm keyword. Overrides
+    (RECURRENCE-ID) of a kept series are kept as well, whatever their summary,
+    so that moved or cancelled occurrences are still applied on expansion.
+    Only the VTIMEZONEs referenced by kept events are carried over.
+
+    Args:
+        lines: Raw lines of the iCalendar body, without line endings
+        keyword: The alarm keyword SUMMARY must start with
+        encoding: Charset of the body, UTF-8 unless the server says otherwise
+
+    Returns:
+        tuple: The reduced iCalendar text and the SHA-256 of the full body
+    """
+    digest = hashlib.sha256()
+    header: List[str] = []
+    timezones: Dict[str, List[str]] = {}
+    kept: List[List[str]] = []
+    overrides: Dict[str, List[Tuple[List[str], Set[str]]]] = {}
+    matched_uids: Set[str] = set()
+    tzids: Set[str] = set()
+
+    depth = 0
+    block: List[str] = []
+    block_type = None
+    props: Dict[str, str] = {}
+    block_tzids: Set[str] = set()
+    total = 0
+
+    for name, params, value, raw in _content_lines(lines, digest, encoding):
+        if name == "BEGIN":
+            depth += 1
+            if depth == 2:
+                block_type = value.upper()
+                block = []
+                props = {}
+                block_tzids = set()
+        elif name == "END":
+            depth -= 1
+
+        if depth == 1 and name not in ("BEGIN", "END"):
+            header.extend(raw)
+            continue
+        if block_type not in ("VEVENT", "VTIMEZONE"):
+            if depth < 2:
+                block_type = None
+            continue
+
+        block.extend(raw)
+        if depth == 2 and name not in ("BEGIN", "END"):
+            props.setdefault(name, value)
+        for match in TZID_PARAM.finditer(params):
+            block_tzids.add(match.group(1).strip('"'))
+
+        if depth > 1:
+            continue
+
+        # The component just ended
+        if block_type == "VTIMEZONE":
+            timezones[props.get("TZID", "")] = block
+        else:
+            total += 1
+            uid = props.get("UID", "")
+            if _unescape(props.get("SUMMARY", "")).strip().startswith(keyword):
+                kept.append(block)
+                matched_uids.add(uid)
+                tzids.update(block_tzids)
+            elif "RECURRENCE-ID" in props:
+                overrides.setdefault(uid, []).append((block, block_tzids))
+        block_type = None
+
+    for uid in matched_uids:
+        for block, block_tzids in overrides.get(uid, []):
+            kept.append(block)
+            tzids.update(block_tzids)
+
+    logger.debug("Kept %d of %d events", len(kept), total)
+
+    out = ["BEGIN:VCALENDAR"]
+    out.extend(header)
+    for tzid in sorted(tzids):
+        out.extend(timezones.get(tzid, []))
+    for block in kept:
+        out.extend(block)
+    out.append("END:VCALENDAR")
+    return "\r\n".join(out) + "\r\n", digest.hexdigest()
+
+
+def _content_lines(lines: Iterable[bytes], digest, encoding: str) -> Iterable[Tuple]:
+    """Unfold raw lines into content lines.
+
+    Lines are unfolded before decoding, since a fold may split a multi-byte
+    character.
+
+    Yields:
+        tuple: (NAME, params, value, [unfolded line]) per content line
+    """
+    raw: List[bytes] = []
+    for line in lines:
+        if not line:
+            continue
+        digest.update(line)
+        digest.update(b"\n")
+        if line[:1] in (b" ", b"\t") and raw:
+            raw.append(line[1:])
+            continue
+        if raw:
+            yield _split_content_line(b"".join(raw).decode(encoding, errors="replace"))
+        raw = [line]
+    if raw:
+        yield _split_content_line(b"".join(raw).decode(encoding, errors="replace"))
+
+
+def _split_content_line(line: str) -> Tuple[str, str, str, List[str]]:
+    raw = [line]
+    in_quotes = False
+    for i, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ":" and not in_quotes:
+            break
+    else:
+        return line.upper(), "", "", raw
+    head, value = line[:i], line[i + 1 :]
+    name, _, params = head.partition(";")
+    return name.upper(), ";" + params if params else "", value, raw
+
+
+def _unescape(value: str) -> str:
+    return re.sub(
+        r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value
+    )
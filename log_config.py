@@ -1,25 +1,23 @@
 import logging
 from config_manager import JsonConfig
-from typing import Optional
-import urllib3
+from typing import Optional, Union
 
 
-def setup_logging(config_file: str = "ulticlock.config") -> None:
+def setup_logging(config: Union[str, JsonConfig] = "ulticlock.config") -> None:
     """Set up logging configuration for the entire application.
 
     Args:
-        config_file: Path to the config file containing debug_level setting
+        config: Loaded config, or path to the config file, containing the
+            debug_level setting
     """
-    config = JsonConfig(config_file)
+    if not isinstance(config, JsonConfig):
+        config = JsonConfig(config)
     logging_level = getattr(logging, config.debug_level.upper(), logging.INFO)
 
     # Clear any existing handlers to avoid duplicate logging
     for handler in logging.root.handlers[:]:
         logging.root.removeHandler(handler)
 
-    # Disable urllib3's default stderr logger
-    urllib3.disable_warnings()
-
     # Configure root logger
     logging.basicConfig(
         level=logging_level, format="%(asctime)s %(name)s %(levelname)s %(message)s"
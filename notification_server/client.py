@@ -1,30 +1,185 @@
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+
 import requests
-from typing import Optional
+
+logger = logging.getLogger(__name__)
+
 
 class NotificationClient:
-    def __init__(self, host: str = "localhost", port: int = 5000):
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 5000,
+        timeout: float = 5.0,
+        background: bool = False,
+        max_queue: int = 100,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        ttl: float = 120.0,
+    ):
         """Initialize the notification client.
-        
+
         Args:
             host: Hostname of the notification server
             port: Port number of the notification server
+            timeout: Seconds to wait for the server to connect and respond
+            background: Queue notifications and send them from a background
+                thread instead of waiting for the server
+            max_queue: Maximum number of queued notifications
+            max_retries: Retries of a queued notification that could not
+                have been delivered (connection error or server error)
+            retry_backoff: Seconds before the first retry, doubled per retry
+            ttl: Seconds after which a queued notification is dropped
+                instead of sent
         """
         self.base_url = f"http://{host}:{port}"
-    
+        self.timeout = timeout
+        self.background = background
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.ttl = ttl
+        # Keeps the connection to the server alive between notifications
+        self.session = requests.Session()
+
+        self.stats_lock = threading.Lock()
+        self.counts = {"sent": 0, "failed": 0, "expired": 0, "overflowed": 0}
+        self.retries = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.closing = threading.Event()
+        self.sender: Optional[threading.Thread] = None
+        if background:
+            self.sender = threading.Thread(
+                target=self._send_loop, name="notification-sender", daemon=True
+            )
+            self.sender.start()
+
     def send_notification(self, message: str) -> bool:
         """Send a notification to the server.
-        
+
+        In background mode the notification is only queued, and this
+        returns without waiting for the server.
+
         Args:
             message: The message to display in the notification
-            
+
+        Returns:
+            bool: True if sent (or queued in background mode), False otherwise
+        """
+        if not self.background:
+            start = time.monotonic()
+            delivered, _ = self._post(message)
+            self._count("sent" if delivered else "failed", time.monotonic() - start)
+            return delivered
+        try:
+            self.queue.put_nowait((message, time.monotonic()))
+            return True
+        except queue.Full:
+            logger.warning("Notification queue full, dropping: %s", message)
+            self._count("overflowed")
+            return False
+
+    def _post(self, message: str) -> Tuple[bool, bool]:
+        """Deliver a notification once.
+
         Returns:
-            bool: True if successful, False otherwise
+            Tuple of whether it was delivered and, if not, whether it is
+            safe to retry. A read timeout is not: the server may have
+            queued the notification before the response was lost.
         """
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/notify",
-                json={"message": message}
+                json={"message": message},
+                timeout=self.timeout,
             )
-            return response.status_code == 200
-        except Exception:
-            return False 
\ No newline at end of file
+        except requests.ConnectionError as e:
+            logger.warning("Notification server %s unreachable: %s", self.base_url, e)
+            return False, True
+        except requests.RequestException as e:
+            logger.warning("Error sending notification: %s", e)
+            return False, False
+        if response.status_code != 200:
+            logger.warning("Notification server returned %s", response.status_code)
+        return response.status_code == 200, response.status_code >= 500
+
+    def _send_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            message, queued_at = item
+            outcome = self._deliver(message, queued_at)
+            self._count(outcome, time.monotonic() - queued_at)
+
+    def _deliver(self, message: str, queued_at: float) -> str:
+        """Send a queued notification, retrying with backoff.
+
+        Returns:
+            str: "sent", "failed" or "expired"
+        """
+        for attempt in range(1 + self.max_retries):
+            if attempt:
+                # Give up retrying once closing
+                if self.closing.wait(self.retry_backoff * 2 ** (attempt - 1)):
+                    break
+                with self.stats_lock:
+                    self.retries += 1
+            if time.monotonic() - queued_at > self.ttl:
+                logger.warning("Dropping expired notification: %s", message)
+                return "expired"
+            delivered, retryable = self._post(message)
+            if delivered:
+                return "sent"
+            if not retryable:
+                break
+        return "failed"
+
+    def _count(self, outcome: str, latency: float = 0.0):
+        with self.stats_lock:
+            self.counts[outcome] += 1
+            if outcome == "sent":
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+
+    def get_stats(self) -> Dict[str, Union[int, float]]:
+        """Get delivery counters and latencies.
+
+        Returns:
+            Dict with the queue depth, the number of notifications sent,
+            failed, expired and dropped because the queue was full, the
+            number of retries, and the average and maximum seconds from
+            send_notification to delivery
+        """
+        with self.stats_lock:
+            sent = self.counts["sent"]
+            return {
+                "queue_depth": self.queue.qsize(),
+                **self.counts,
+                "retries": self.retries,
+                "avg_latency": self.total_latency / sent if sent else 0.0,
+                "max_latency": self.max_latency,
+            }
+
+    def close(self, timeout: float = 5.0):
+        """Stop the background sender and close the connection.
+
+        Queued notifications are still attempted once each until timeout.
+
+        Args:
+            timeout: Seconds to wait for the sender to finish
+        """
+        if self.sender is not None:
+            self.closing.set()
+            try:
+                self.queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self.sender.join(timeout)
+        self.session.close()
@@ -0,0 +1,209 @@
+import collections
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# What NotificationQueue.submit does when the queue is full
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "reject")
+
+TOAST_TITLE = "Alarm Notification"
+TOAST_DURATION = 10  # seconds
+
+
+class WindowsToastBackend:
+    """Shows notifications as Windows toasts."""
+
+    def __init__(self):
+        from win10toast import ToastNotifier
+
+        self.toaster = ToastNotifier()
+
+    def show(self, title: str, message: str) -> None:
+        self.toaster.show_toast(title, message, duration=TOAST_DURATION, threaded=True)
+
+
+class WindowsSoundBackend:
+    """Plays the alarm sound with winsound, from memory."""
+
+    def __init__(self, sound_file: Path):
+        """Initialize the backend.
+
+        Args:
+            sound_file: WAV file to play, read once here. If it does not
+                exist the system exclamation sound is played instead.
+        """
+        import winsound
+
+        self.winsound = winsound
+        self.sound: Optional[bytes] = None
+        if sound_file.exists():
+            self.sound = sound_file.read_bytes()
+            logger.debug("Loaded sound file %s", sound_file)
+
+    def play(self) -> None:
+        if self.sound is not None:
+            self.winsound.PlaySound(self.sound, self.winsound.SND_MEMORY)
+        else:
+            self.winsound.PlaySound("SystemExclamation", self.winsound.SND_ALIAS)
+
+
+class FakeToastBackend:
+    """Records toasts instead of showing them, for testing."""
+
+    def __init__(self):
+        self.shown: List[Tuple[str, str]] = []
+
+    def show(self, title: str, message: str) -> None:
+        self.shown.append((title, message))
+
+
+class FakeSoundBackend:
+    """Records sound playback instead of playing, for testing.
+
+    Args:
+        duration: Seconds each play blocks, like a real sound would
+    """
+
+    def __init__(self, duration: float = 0.0):
+        self.duration = duration
+        self.played = 0
+
+    def play(self) -> None:
+        self.played += 1
+        time.sleep(self.duration)
+
+
+class NotificationQueue:
+    """Bounded notification queue drained by a single consumer thread.
+
+    Requests only enqueue. The consumer shows one toast and plays the
+    sound once for each burst of messages: everything queued while the
+    previous sound played, or within the coalesce window of the first
+    message. Duplicate messages in a burst are shown once.
+    """
+
+    def __init__(
+        self,
+        toast_backend,
+        sound_backend,
+        max_size: int = 32,
+        coalesce_window: float = 0.5,
+        overflow_policy: str = "drop_oldest",
+    ):
+        """Initialize the queue and start the consumer.
+
+        Args:
+            toast_backend: Object with show(title, message)
+            sound_backend: Object with play(), blocking while it plays
+            max_size: Maximum number of queued messages
+            coalesce_window: Seconds to wait after a message for others to
+                show with it
+            overflow_policy: "drop_oldest", "drop_newest" or "reject" when
+                the queue is full
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError("Unknown overflow policy: %s" % overflow_policy)
+        self.toast_backend = toast_backend
+        self.sound_backend = sound_backend
+        self.max_size = max_size
+        self.coalesce_window = coalesce_window
+        self.overflow_policy = overflow_policy
+
+        self.messages: Deque[str] = collections.deque()
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.running = True
+        self.stats = {"received": 0, "dropped": 0, "rejected": 0, "shown": 0}
+
+        self.consumer = threading.Thread(
+            target=self._consume, name="notify-consumer", daemon=True
+        )
+        self.consumer.start()
+
+    def submit(self, message: str) -> bool:
+        """Queue a message for display.
+
+        Args:
+            message: The message to show
+
+        Returns:
+            bool: False if the queue is full and the policy is "reject",
+                True otherwise, even if a message was dropped to make room
+        """
+        with self.lock:
+            self.stats["received"] += 1
+            if len(self.messages) >= self.max_size:
+                if self.overflow_policy == "reject":
+                    self.stats["rejected"] += 1
+                    logger.warning("Notification queue full, rejecting: %s", message)
+                    return False
+                self.stats["dropped"] += 1
+                if self.overflow_policy == "drop_newest":
+                    logger.warning("Notification queue full, dropping: %s", message)
+                    return True
+                logger.warning(
+                    "Notification queue full, dropping: %s", self.messages.popleft()
+                )
+            self.messages.append(message)
+            self.changed.notify()
+            return True
+
+    def _next_burst(self) -> List[str]:
+        """Wait for a message and collect the burst it starts.
+
+        Returns:
+            list: The distinct messages of the burst in arrival order, empty
+                once the queue is closed
+        """
+        with self.lock:
+            while not self.messages and self.running:
+                self.changed.wait()
+            deadline = time.monotonic() + self.coalesce_window
+            while self.running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.changed.wait(remaining)
+            burst = list(dict.fromkeys(self.messages))
+            self.messages.clear()
+            return burst
+
+    def _consume(self):
+        while True:
+            burst = self._next_burst()
+            if not burst:
+                return
+            logger.info("Showing %d notification(s)", len(burst))
+            try:
+                self.toast_backend.show(TOAST_TITLE, "\n".join(burst))
+                # Blocks while playing; messages meanwhile form the next burst
+                self.sound_backend.play()
+            except Exception as e:
+                logger.error("Error showing notification: %s", e, exc_info=True)
+            with self.lock:
+                self.stats["shown"] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get queue counters.
+
+        Returns:
+            Dict with the queue depth and the number of messages received,
+            dropped and rejected on overflow, and toasts shown
+        """
+        with self.lock:
+            return {"queue_depth": len(self.messages), **self.stats}
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the consumer after the current burst.
+
+        Args:
+            timeout: Seconds to wait for the consumer to finish
+        """
+        with self.lock:
+            self.running = False
+            self.changed.notify_all()
+        self.consumer.join(timeout)
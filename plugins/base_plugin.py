@@ -43,6 +43,36 @@ class AlarmPlugin(ABC):
         """
         pass
     
+    def prepare(self, alarm_id: str, context: Optional[Dict[str, Any]] = None) -> None:
+        """Warm up for an upcoming alarm. Called a lead time before it fires.
+        
+        Open connections, resolve hosts, load sounds and so on here, so that
+        execute only has to use them. For an alarm created less than the
+        lead time before it fires, prepare is called right away and may
+        still be running when execute is called. Runs on a plugin worker
+        thread.
+        
+        Args:
+            alarm_id: Unique identifier for the alarm
+            context: Optional context data, with "trigger_time" in ISO format
+        """
+        pass
+    
+    def release(self, alarm_id: str) -> None:
+        """Free what prepare set up for an alarm.
+        
+        Called after the alarm executed, or when it was cancelled, or moved
+        outside the lead time, once prepare returned. Called even if prepare
+        raised, and may run while an execute that timed out is still running.
+        An alarm created again with the same id may be prepared again before
+        the earlier preparation is released, so count preparations per
+        alarm_id instead of keeping a set.
+        
+        Args:
+            alarm_id: Unique identifier for the alarm
+        """
+        pass
+    
     @abstractmethod
     def cleanup(self) -> None:
         """Cleanup plugin resources. Called when shutting down."""
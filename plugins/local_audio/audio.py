@@ -0,0 +1,275 @@
+import array
+import io
+import logging
+import math
+import mmap
+import struct
+import sys
+import time
+import wave
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+SAMPLE_WIDTH = 2  # Only 16-bit PCM is supported
+
+# Beeps played by Sound.tone when no sound file is available
+TONE_FREQUENCY = 880
+TONE_RATE = 22050
+TONE_BEEPS = 4
+TONE_BEEP_SECONDS = 0.25
+
+Buffer = Union[bytes, memoryview]
+
+
+class Sound:
+    """A 16-bit PCM WAV file, memory-mapped and ready to stream.
+
+    Only the start of the sound, with the volume ramp applied, is copied
+    here. The rest is streamed straight from the mapping, scaled one period
+    at a time if the volume is below 1.
+    """
+
+    def __init__(self, path: Path, volume: float = 1.0, ramp_seconds: float = 0.0):
+        """Map and decode a WAV file.
+
+        Args:
+            path: The WAV file
+            volume: Gain from 0 to 1
+            ramp_seconds: Seconds to ramp the volume up from silence
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If it is not a 16-bit PCM WAV file
+        """
+        self.path: Optional[Path] = path
+        with open(path, "rb") as f:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mmap, "MADV_WILLNEED"):
+            self.mapping.madvise(mmap.MADV_WILLNEED)
+        self._decode(volume, ramp_seconds)
+
+    @classmethod
+    def tone(cls, volume: float = 1.0, ramp_seconds: float = 0.0) -> "Sound":
+        """Generate a beeping tone, for when no sound file is available.
+
+        Args:
+            volume: Gain from 0 to 1
+            ramp_seconds: Seconds to ramp the volume up from silence
+        """
+        data = _tone_wav()
+        sound = cls.__new__(cls)
+        sound.path = None
+        sound.mapping = mmap.mmap(-1, len(data))
+        sound.mapping.write(data)
+        sound._decode(volume, ramp_seconds)
+        return sound
+
+    def _decode(self, volume: float, ramp_seconds: float) -> None:
+        self.channels, self.rate, start, end = _parse_wav(self.mapping)
+        self.frame_size = self.channels * SAMPLE_WIDTH
+        end -= (end - start) % self.frame_size
+
+        pcm = memoryview(self.mapping)[start:end]
+        ramp_end = min(int(ramp_seconds * self.rate) * self.frame_size, len(pcm))
+        self.volume = volume
+        self.ramp: Buffer = _scale(pcm[:ramp_end], self.channels, 0.0, volume)
+        self.head: Buffer = pcm[:ramp_end]
+        self.body: Buffer = pcm[ramp_end:]
+        self.duration = len(pcm) / self.frame_size / self.rate
+        logger.debug(
+            "Loaded %s: %d channels at %d Hz, %.1fs",
+            self.path or "tone",
+            self.channels,
+            self.rate,
+            self.duration,
+        )
+
+    def chunks(self, period_frames: int, repeat: int = 1) -> Iterator[Buffer]:
+        """Iterate over the PCM data in periods.
+
+        Args:
+            period_frames: Frames per chunk
+            repeat: Times to play the sound, the first time ramped up
+
+        Yields:
+            Chunks of at most period_frames frames
+        """
+        size = period_frames * self.frame_size
+        for i in range(repeat):
+            if i:
+                yield from self._scaled(_split(self.head, size))
+            else:
+                yield from _split(self.ramp, size)
+            yield from self._scaled(_split(self.body, size))
+
+    def _scaled(self, chunks: Iterator[memoryview]) -> Iterator[Buffer]:
+        if self.volume >= 1.0:
+            return chunks
+        return (_scale(c, self.channels, self.volume, self.volume) for c in chunks)
+
+    def close(self) -> None:
+        self.ramp = self.head = self.body = b""
+        try:
+            self.mapping.close()
+        except BufferError:
+            # A chunk is still referenced, the mapping goes with it
+            pass
+
+
+class NullSink:
+    """Discards audio, recording when it was written. For testing."""
+
+    def __init__(self):
+        self.opened = 0
+        self.bytes_written = 0
+        self.write_times: List[float] = []
+
+    def open(self, channels: int, rate: int) -> None:
+        self.opened += 1
+
+    def write(self, data: Buffer) -> None:
+        self.bytes_written += len(data)
+        self.write_times.append(time.monotonic())
+
+    def close(self) -> None:
+        pass
+
+
+class FileSink:
+    """Writes audio to a WAV file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.file = None
+
+    def open(self, channels: int, rate: int) -> None:
+        self.file = wave.open(str(self.path), "wb")
+        self.file.setnchannels(channels)
+        self.file.setsampwidth(SAMPLE_WIDTH)
+        self.file.setframerate(rate)
+
+    def write(self, data: Buffer) -> None:
+        self.file.writeframesraw(data)
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class AlsaSink:
+    """Plays audio on an ALSA device. Needs pyalsaaudio."""
+
+    def __init__(self, device: str = "default", period_frames: int = 1024):
+        import alsaaudio
+
+        self.alsaaudio = alsaaudio
+        self.device = device
+        self.period_frames = period_frames
+        self.pcm = None
+
+    def open(self, channels: int, rate: int) -> None:
+        self.pcm = self.alsaaudio.PCM(
+            self.alsaaudio.PCM_PLAYBACK,
+            device=self.device,
+            channels=channels,
+            rate=rate,
+            format=self.alsaaudio.PCM_FORMAT_S16_LE,
+            periodsize=self.period_frames,
+        )
+
+    def write(self, data: Buffer) -> None:
+        # Blocks once the device buffer is full, pacing the stream
+        self.pcm.write(data)
+
+    def close(self) -> None:
+        if self.pcm is not None:
+            self.pcm.close()
+            self.pcm = None
+
+
+def _split(data: Buffer, size: int) -> Iterator[memoryview]:
+    view = memoryview(data)
+    for offset in range(0, len(view), size):
+        yield view[offset : offset + size]
+
+
+def _scale(pcm: Buffer, channels: int, start_gain: float, end_gain: float) -> bytes:
+    """Apply a gain ramping linearly from start_gain to end_gain."""
+    samples = array.array("h")
+    samples.frombytes(pcm)
+    if sys.byteorder == "big":
+        samples.byteswap()
+    if start_gain == end_gain:
+        # Fixed point, this runs once per period while playing
+        gain = int(start_gain * 32768)
+        samples = array.array("h", [s * gain >> 15 for s in samples])
+    else:
+        step = (end_gain - start_gain) / max(len(samples) // channels, 1)
+        samples = array.array(
+            "h",
+            [
+                int(s * (start_gain + step * (i // channels)))
+                for i, s in enumerate(samples)
+            ],
+        )
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples.tobytes()
+
+
+def _tone_wav() -> bytes:
+    """Build a mono WAV file of TONE_BEEPS beeps, each followed by silence."""
+    beep = int(TONE_BEEP_SECONDS * TONE_RATE)
+    samples = array.array(
+        "h",
+        [
+            int(32767 * math.sin(2 * math.pi * TONE_FREQUENCY * i / TONE_RATE))
+            for i in range(beep)
+        ]
+        + [0] * beep,
+    )
+    if sys.byteorder == "big":
+        samples.byteswap()
+    data = io.BytesIO()
+    with wave.open(data, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(SAMPLE_WIDTH)
+        f.setframerate(TONE_RATE)
+        f.writeframes(samples.tobytes() * TONE_BEEPS)
+    return data.getvalue()
+
+
+def _parse_wav(data: Buffer) -> Tuple[int, int, int, int]:
+    """Find the format and the PCM data of a RIFF/WAVE file.
+
+    Returns:
+        tuple: Channels, sample rate, and start and end offset of the data
+
+    Raises:
+        ValueError: If it is not a 16-bit PCM WAV file
+    """
+    if len(data) < 12 or data[0:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("not a RIFF/WAVE file")
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset : offset + 4]
+        (size,) = struct.unpack_from("<I", data, offset + 4)
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack_from("<HHIIHH", data, body)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("data chunk before fmt chunk")
+            tag, channels, rate, _, _, bits = fmt
+            if tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_EXTENSIBLE) or bits != 16:
+                raise ValueError("only 16-bit PCM is supported")
+            return channels, rate, body, min(body + size, len(data))
+        # Chunks are padded to an even size
+        offset = body + size + (size & 1)
+    raise ValueError("no data chunk")
@@ -0,0 +1,191 @@
+from plugins.base_plugin import AlarmPlugin
+from plugins.local_audio.audio import AlsaSink, FileSink, NullSink, Sound
+from collections import deque
+from typing import Dict, Any, Optional
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Latencies kept for get_stats
+LATENCY_HISTORY = 100
+
+
+class LocalAudioPlugin(AlarmPlugin):
+    """Plays an alarm sound on the Pi itself.
+
+    Sounds are decoded once at initialize. The output device is opened when
+    an alarm is prepared, so execute only has to write the first period.
+
+    A sound file that is missing plays a generated tone instead. ALSA
+    output needs pyalsaaudio (plugins/local_audio/requirements.txt); without
+    it the plugin falls back to the null sink and stays silent.
+    """
+
+    def initialize(self) -> bool:
+        logger.debug("Initializing local audio plugin")
+        try:
+            volume = self.config.get('volume', 1.0)
+            ramp_seconds = self.config.get('ramp_seconds', 0.0)
+            self.sounds: Dict[str, Sound] = {
+                name: self._load_sound(path, volume, ramp_seconds)
+                for name, path in self.config.get('sounds', {}).items()
+            }
+            self.default_sound = self.config.get('default_sound', 'default')
+            if self.default_sound not in self.sounds:
+                logger.error("Default sound %s is not configured", self.default_sound)
+                return False
+            self.period_frames = self.config.get('period_frames', 1024)
+            self.repeat = self.config.get('repeat', 1)
+            self.sink = self._create_sink()
+        except Exception as e:
+            logger.error(
+                "Failed to initialize local audio plugin: %s",
+                e,
+                exc_info=True
+            )
+            return False
+
+        self.lock = threading.Lock()
+        self.prepared: Dict[str, int] = {}  # Preparations per alarm
+        self.sink_format = None  # (channels, rate) the sink is open with
+        self.player: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+        # Seconds from execute to the first period written to the sink
+        self.latencies = deque(maxlen=LATENCY_HISTORY)
+        logger.info("Local audio plugin initialized with %d sounds", len(self.sounds))
+        return True
+
+    def _load_sound(self, path: str, volume: float, ramp_seconds: float) -> Sound:
+        sound_file = self.plugin_dir / path
+        if not sound_file.exists():
+            logger.warning("Sound file %s not found, using a generated tone", sound_file)
+            return Sound.tone(volume, ramp_seconds)
+        return Sound(sound_file, volume, ramp_seconds)
+
+    def _create_sink(self):
+        sink = self.config.get('sink', 'alsa')
+        if sink == 'alsa':
+            try:
+                return AlsaSink(self.config.get('device', 'default'), self.period_frames)
+            except ImportError:
+                logger.warning(
+                    "pyalsaaudio is not installed, local audio is silent until "
+                    "plugins/local_audio/requirements.txt is installed"
+                )
+                return NullSink()
+        if sink == 'file':
+            return FileSink(self.plugin_dir / self.config.get('output_file', 'alarm_output.wav'))
+        if sink == 'null':
+            return NullSink()
+        raise ValueError("Unknown sink: %s" % sink)
+
+    def _open_sink(self, sound: Sound) -> None:
+        """Open the sink for a sound's format. Must be called with lock held."""
+        if self.sink_format == (sound.channels, sound.rate):
+            return
+        self._close_sink()
+        self.sink.open(sound.channels, sound.rate)
+        self.sink_format = (sound.channels, sound.rate)
+
+    def _close_sink(self) -> None:
+        """Close the sink. Must be called with lock held."""
+        if self.sink_format is not None:
+            self.sink.close()
+            self.sink_format = None
+
+    def _sound(self, context: Optional[Dict[str, Any]]) -> Sound:
+        name = (context or {}).get('sound', self.default_sound)
+        if name not in self.sounds:
+            logger.warning("Unknown sound %s, using %s", name, self.default_sound)
+            name = self.default_sound
+        return self.sounds[name]
+
+    def prepare(self, alarm_id: str, context: Optional[Dict[str, Any]] = None) -> None:
+        with self.lock:
+            self.prepared[alarm_id] = self.prepared.get(alarm_id, 0) + 1
+            if self.player is None:
+                self._open_sink(self._sound(context))
+        logger.debug("Audio output ready for alarm %s", alarm_id)
+
+    def release(self, alarm_id: str) -> None:
+        with self.lock:
+            count = self.prepared.pop(alarm_id, 0) - 1
+            if count > 0:
+                self.prepared[alarm_id] = count
+            if self.player is None and not self.prepared:
+                self._close_sink()
+
+    def execute(self, alarm_id: str, context: Optional[Dict[str, Any]] = None) -> bool:
+        start = time.monotonic()
+        sound = self._sound(context)
+        with self.lock:
+            if self.player is not None:
+                logger.info("Alarm sound already playing, not starting for %s", alarm_id)
+                return True
+            try:
+                self._open_sink(sound)
+                chunks = sound.chunks(self.period_frames, self.repeat)
+                self.sink.write(next(chunks))
+            except Exception as e:
+                logger.error("Failed to play alarm sound: %s", e, exc_info=True)
+                self._close_sink()
+                return False
+            latency = time.monotonic() - start
+            self.latencies.append(latency)
+            self.stopping.clear()
+            self.player = threading.Thread(
+                target=self._play, args=(chunks,), name="local-audio", daemon=True
+            )
+            self.player.start()
+        logger.info(
+            "Alarm sound started for %s, %.1f ms to first period",
+            alarm_id,
+            latency * 1000
+        )
+        return True
+
+    def _play(self, chunks) -> None:
+        """Stream the rest of the sound, started by execute."""
+        try:
+            for chunk in chunks:
+                if self.stopping.is_set():
+                    break
+                self.sink.write(chunk)
+        except Exception as e:
+            logger.error("Alarm sound playback failed: %s", e, exc_info=True)
+        finally:
+            with self.lock:
+                self.player = None
+                if not self.prepared:
+                    self._close_sink()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get the latency from execute to the first period written.
+
+        Returns:
+            Dict with the number of samples and the last, median and maximum
+            latency in seconds
+        """
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return {"count": 0}
+        return {
+            "count": len(latencies),
+            "last": self.latencies[-1],
+            "median": latencies[len(latencies) // 2],
+            "max": latencies[-1],
+        }
+
+    def cleanup(self) -> None:
+        """Stop playback and release the device and sound buffers."""
+        self.stopping.set()
+        player = self.player
+        if player is not None:
+            player.join(5)
+        with self.lock:
+            self._close_sink()
+        logger.debug("Local audio latency: %s", self.get_stats())
+        for sound in self.sounds.values():
+            sound.close()
@@ -1,7 +1,14 @@
 from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import ast
 import importlib.util
+import itertools
+import json
 import logging
-from typing import Dict, List, Type
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
 from .base_plugin import AlarmPlugin
 
 logging.basicConfig(
@@ -9,6 +16,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Seconds a plugin may run before execute_all stops waiting for it. Plugins
+# can override it with "timeout" in their config.json.
+DEFAULT_PLUGIN_TIMEOUT = 10.0
+
+# Cache of what discover_plugins found, kept in the plugins directory
+MANIFEST_FILE = ".manifest.json"
+MANIFEST_VERSION = 1
+
 
 class PluginManager:
     def __init__(self, plugins_dir: Path):
@@ -19,12 +34,31 @@ class PluginManager:
         """
         logger.debug("Initializing plugin manager with directory: %s", plugins_dir)
         self.plugins_dir = plugins_dir
-        self.plugins: Dict[str, AlarmPlugin] = {}
+        self.plugins: Dict[str, AlarmPlugin] = {}  # Loaded plugins
+        self.manifest: Dict[str, Dict[str, Any]] = {}  # All discovered plugins
+        self.failed: Set[str] = set()  # Plugins that failed to load
+        self.load_lock = threading.Lock()
+        # Alarm id and prepare future per plugin of each preparation, for
+        # release_all
+        self.prepared: Dict[int, Tuple[str, Dict[str, Future]]] = {}
+        self.prepared_lock = threading.Lock()
+        self.preparation_ids = itertools.count(1)
+        self.executor: Optional[ThreadPoolExecutor] = None  # See _pool
+        self.executor_lock = threading.Lock()
 
     def discover_plugins(self) -> None:
-        """Discover and load all plugins in the plugins directory."""
+        """Index the plugins in the plugins directory.
+
+        Plugins are not imported here. Their class name and scheduling
+        settings are kept in a manifest in the plugins directory, and only
+        plugins whose plugin.py or config.json changed since it was written
+        are scanned again. Plugins are loaded on first use, except those with
+        "eager": true in their config.json, which are loaded right away.
+        """
         logger.info("Starting plugin discovery")
-        for plugin_dir in self.plugins_dir.iterdir():
+        cached = self._read_manifest()
+        manifest = {}
+        for plugin_dir in sorted(self.plugins_dir.iterdir()):
             if not plugin_dir.is_dir() or plugin_dir.name.startswith("_"):
                 logger.debug(
                     "Skipping %s: not a valid plugin directory", plugin_dir.name
@@ -32,84 +66,342 @@ class PluginManager:
                 continue
 
             try:
-                logger.debug("Examining potential plugin: %s", plugin_dir.name)
-                # Look for plugin.py in the plugin directory
-                plugin_file = plugin_dir / "plugin.py"
-                if not plugin_file.exists():
-                    logger.debug("No plugin.py found in %s", plugin_dir.name)
-                    continue
+                plugin_mtime = (plugin_dir / "plugin.py").stat().st_mtime
+            except FileNotFoundError:
+                logger.debug("No plugin.py found in %s", plugin_dir.name)
+                continue
+            config_file = plugin_dir / "config.json"
+            config_mtime = config_file.stat().st_mtime if config_file.exists() else None
 
-                # Load the module
-                spec = importlib.util.spec_from_file_location("plugins.%s", plugin_file)
-                if spec is None or spec.loader is None:
+            entry = cached.get(plugin_dir.name)
+            if entry is None or (entry["plugin_mtime"], entry["config_mtime"]) != (
+                plugin_mtime,
+                config_mtime,
+            ):
+                logger.debug("Scanning plugin: %s", plugin_dir.name)
+                try:
+                    entry = _scan_plugin(plugin_dir)
+                except (OSError, SyntaxError, ValueError) as e:
+                    logger.error("Error scanning plugin %s: %s", plugin_dir.name, e)
                     continue
+                entry["plugin_mtime"] = plugin_mtime
+                entry["config_mtime"] = config_mtime
+            manifest[plugin_dir.name] = entry
 
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-
-                # Find the plugin class (subclass of AlarmPlugin)
-                plugin_class = None
-                for attr in dir(module):
-                    obj = getattr(module, attr)
-                    if (
-                        isinstance(obj, type)
-                        and issubclass(obj, AlarmPlugin)
-                        and obj != AlarmPlugin
-                    ):
-                        plugin_class = obj
-                        break
-
-                logger.debug("Loading plugin module: %s", plugin_dir.name)
-
-                if plugin_class is None:
-                    logger.warning("No valid plugin class found in %s", plugin_dir.name)
-                    continue
+        self.manifest = manifest
+        if manifest != cached:
+            self._write_manifest()
+
+        # Sized for the new manifest on next use
+        with self.executor_lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False)
+                self.executor = None
 
-                # Initialize the plugin
-                logger.debug("Initializing plugin: %s", plugin_dir.name)
-                plugin = plugin_class(plugin_dir)
-                if plugin.initialize():
-                    self.plugins[plugin_dir.name] = plugin
-                    logger.info("Successfully loaded plugin: %s", plugin_dir.name)
+        for name, entry in self.manifest.items():
+            if entry["eager"]:
+                self.get_plugin(name)
+        logger.info(
+            "Found %d plugins, loaded %d eagerly", len(self.manifest), len(self.plugins)
+        )
+
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        manifest_file = self.plugins_dir / MANIFEST_FILE
+        try:
+            with open(manifest_file, "r") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable plugin manifest %s", manifest_file)
+            return {}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {}
+        return manifest["plugins"]
+
+    def _write_manifest(self) -> None:
+        manifest_file = self.plugins_dir / MANIFEST_FILE
+        tmp_file = manifest_file.with_name(manifest_file.name + ".tmp")
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump({"version": MANIFEST_VERSION, "plugins": self.manifest}, f)
+            os.replace(tmp_file, manifest_file)
+        except OSError as e:
+            logger.warning("Unable to write plugin manifest %s: %s", manifest_file, e)
+
+    def get_plugin(self, name: str) -> Optional[AlarmPlugin]:
+        """Get a plugin, importing and initializing it on first use.
+
+        Args:
+            name: Name of the plugin directory
+
+        Returns:
+            AlarmPlugin: The initialized plugin, or None if it is unknown or
+                failed to load
+        """
+        with self.load_lock:
+            plugin = self.plugins.get(name)
+            if plugin is None and name in self.manifest and name not in self.failed:
+                plugin = self._load_plugin(name)
+                if plugin is None:
+                    self.failed.add(name)
                 else:
-                    logger.error("Plugin initialization failed: %s", plugin_dir.name)
+                    self.plugins[name] = plugin
+            return plugin
 
-            except Exception as e:
-                logger.error(
-                    "Error loading plugin %s: %s", plugin_dir.name, e, exc_info=True
-                )
+    def _load_plugin(self, name: str) -> Optional[AlarmPlugin]:
+        """Import and initialize a plugin. Must be called with load_lock held."""
+        plugin_dir = self.plugins_dir / name
+        class_name = self.manifest[name]["class"]
+        try:
+            logger.debug("Loading plugin module: %s", name)
+            spec = importlib.util.spec_from_file_location(
+                "plugins.%s.plugin" % name, plugin_dir / "plugin.py"
+            )
+            if spec is None or spec.loader is None:
+                return None
+
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+
+            plugin_class = getattr(module, class_name, None)
+            if not (
+                isinstance(plugin_class, type) and issubclass(plugin_class, AlarmPlugin)
+            ):
+                logger.warning("No plugin class %s found in %s", class_name, name)
+                return None
+
+            # Initialize the plugin
+            logger.debug("Initializing plugin: %s", name)
+            plugin = plugin_class(plugin_dir)
+            if not plugin.initialize():
+                logger.error("Plugin initialization failed: %s", name)
+                return None
+            logger.info("Successfully loaded plugin: %s", name)
+            return plugin
+
+        except Exception as e:
+            logger.error("Error loading plugin %s: %s", name, e, exc_info=True)
+            return None
+
+    def _select(self, alarm_id: str, plugin_list: Optional[List[str]]) -> List[str]:
+        """Get the names of the known plugins an alarm runs."""
+        if not plugin_list:
+            return list(self.manifest)
+        for name in set(plugin_list).difference(self.manifest):
+            logger.warning("Unknown plugin %s for alarm %s", name, alarm_id)
+        return [name for name in self.manifest if name in plugin_list]
+
+    def prepare_all(
+        self,
+        alarm_id: str,
+        plugin_list: List[str] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """Start preparing plugins for an upcoming alarm, without waiting.
+
+        Plugins not loaded yet are loaded first, so the alarm runs against
+        loaded and warmed up plugins.
+
+        Args:
+            alarm_id: Unique identifier for the alarm
+            plugin_list: Optional list of plugin names the alarm executes
+            context: Optional context data passed to prepare
+
+        Returns:
+            int: Id of the preparation, to pass to release_all
+        """
+        names = self._select(alarm_id, plugin_list)
+        logger.debug("Preparing plugins %s for alarm %s", names, alarm_id)
+        futures = {
+            name: self._pool().submit(
+                self._call_plugin, name, "prepare", alarm_id, context
+            )
+            for name in names
+        }
+        with self.prepared_lock:
+            preparation = next(self.preparation_ids)
+            self.prepared[preparation] = (alarm_id, futures)
+        return preparation
+
+    def release_all(self, preparation: int) -> None:
+        """Start releasing the plugins of a preparation, without waiting.
 
-    def execute_all(self, alarm_id: str, plugin_list: List[str] = None) -> None:
+        Each plugin is released only once its prepare has returned.
+
+        Args:
+            preparation: Id returned by prepare_all
+        """
+        with self.prepared_lock:
+            alarm_id, futures = self.prepared.pop(preparation, (None, {}))
+        if futures:
+            logger.debug("Releasing plugins %s for alarm %s", list(futures), alarm_id)
+        for name, future in futures.items():
+            future.add_done_callback(
+                lambda _, name=name: self._submit_release(name, alarm_id)
+            )
+
+    def _submit_release(self, name: str, alarm_id: str) -> None:
+        try:
+            self._pool().submit(self._call_plugin, name, "release", alarm_id)
+        except RuntimeError:
+            # Shutting down, cleanup releases everything
+            pass
+
+    def execute_all(
+        self, alarm_id: str, plugin_list: List[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
         """Execute all plugins or specified plugins for an alarm.
 
+        Plugins run concurrently, each with its own deadline ("timeout" in
+        its config.json). A plugin listing other plugins under "after" in its
+        config.json starts once those have finished or timed out. A plugin
+        that times out keeps running in the background but is no longer
+        waited for. Plugins not loaded yet are loaded first, within their
+        deadline.
+
         Args:
             alarm_id: Unique identifier for the alarm
             plugin_list: Optional list of plugin names to execute
+
+        Returns:
+            Dict of plugin name to its result: "status" ("ok", "failed",
+            "error", "timeout" or "skipped") and "duration" in seconds
         """
         logger.debug("Executing plugins for alarm %s", alarm_id)
         if plugin_list:
             logger.debug("Using specific plugin list: %s", plugin_list)
 
-        plugins_to_execute = self.plugins
-        if plugin_list:
-            plugins_to_execute = {
-                name: plugin
-                for name, plugin in self.plugins.items()
-                if name in plugin_list
-            }
-
-        for name, plugin in plugins_to_execute.items():
-            try:
+        start = time.monotonic()
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = {
+            name: self.manifest[name] for name in self._select(alarm_id, plugin_list)
+        }
+        running = {}  # Future -> (name, timeout, deadline)
+        while pending or running:
+            unfinished = set(pending)
+            unfinished.update(name for name, _, _ in running.values())
+            for name, entry in list(pending.items()):
+                if unfinished.intersection(entry["after"]):
+                    continue
+                del pending[name]
                 logger.info("Executing plugin %s for alarm %s", name, alarm_id)
-                plugin.execute(alarm_id)
-                logger.debug("Plugin %s execution completed", name)
-            except Exception as e:
-                logger.error("Error executing plugin %s: %s", name, e, exc_info=True)
+                timeout = entry["timeout"]
+                future = self._pool().submit(self._run_plugin, name, alarm_id)
+                running[future] = (name, timeout, time.monotonic() + timeout)
+
+            if not running:
+                # Only plugins waiting on each other are left
+                for name in pending:
+                    logger.error('Plugin %s has circular "after" dependencies', name)
+                    results[name] = {"status": "skipped", "duration": 0.0}
+                break
+
+            next_deadline = min(deadline for _, _, deadline in running.values())
+            wait(
+                running,
+                timeout=max(0, next_deadline - time.monotonic()),
+                return_when=FIRST_COMPLETED,
+            )
+            now = time.monotonic()
+            for future, (name, timeout, deadline) in list(running.items()):
+                if future.done():
+                    results[name] = future.result()
+                    logger.debug("Plugin %s execution completed", name)
+                elif now >= deadline:
+                    logger.error("Plugin %s timed out after %ss", name, timeout)
+                    results[name] = {"status": "timeout", "duration": timeout}
+                else:
+                    continue
+                del running[future]
+
+        logger.info(
+            "Plugins for alarm %s finished in %.3fs",
+            alarm_id,
+            time.monotonic() - start,
+        )
+        return results
+
+    def _pool(self) -> ThreadPoolExecutor:
+        """Get the plugin worker pool, creating it on first use."""
+        with self.executor_lock:
+            if self.executor is None:
+                # Spare workers so a plugin stuck past its deadline doesn't
+                # hold up the plugins of the next alarm
+                self.executor = ThreadPoolExecutor(
+                    max_workers=max(2 * len(self.manifest), 1),
+                    thread_name_prefix="plugin",
+                )
+            return self.executor
 
     def cleanup(self) -> None:
         """Cleanup all plugins."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
         for name, plugin in self.plugins.items():
             try:
                 plugin.cleanup()
             except Exception as e:
                 logger.error("Error cleaning up plugin %s: %s", name, e)
+
+    def _call_plugin(self, name: str, method: str, alarm_id: str, *args) -> None:
+        """Call a lifecycle method of a plugin, logging its errors."""
+        plugin = self.get_plugin(name)
+        if plugin is None:
+            return
+        try:
+            getattr(plugin, method)(alarm_id, *args)
+        except Exception as e:
+            logger.error("Error in %s of plugin %s: %s", method, name, e, exc_info=True)
+
+    def _run_plugin(self, name: str, alarm_id: str) -> Dict[str, Any]:
+        """Load and execute one plugin, timing it and catching its errors."""
+        start = time.monotonic()
+        plugin = self.get_plugin(name)
+        if plugin is None:
+            status = "error"
+        else:
+            try:
+                status = "ok" if plugin.execute(alarm_id) else "failed"
+            except Exception as e:
+                logger.error("Error executing plugin %s: %s", name, e, exc_info=True)
+                status = "error"
+        return {"status": status, "duration": time.monotonic() - start}
+
+
+def _scan_plugin(plugin_dir: Path) -> Dict[str, Any]:
+    """Build the manifest entry of a plugin without importing it.
+
+    The plugin class is the first class in plugin.py deriving directly from
+    AlarmPlugin.
+
+    Raises:
+        OSError: If plugin.py or config.json cannot be read
+        SyntaxError: If plugin.py is not valid Python
+        ValueError: If there is no plugin class or config.json is invalid
+    """
+    with open(plugin_dir / "plugin.py", "rb") as f:
+        tree = ast.parse(f.read(), filename=str(plugin_dir / "plugin.py"))
+    class_name = None
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and any(
+            (isinstance(base, ast.Name) and base.id == AlarmPlugin.__name__)
+            or (isinstance(base, ast.Attribute) and base.attr == AlarmPlugin.__name__)
+            for base in node.bases
+        ):
+            class_name = node.name
+            break
+    if class_name is None:
+        raise ValueError("no AlarmPlugin subclass in plugin.py")
+
+    config = {}
+    config_file = plugin_dir / "config.json"
+    if config_file.exists():
+        with open(config_file, "r") as f:
+            config = json.load(f)
+    return {
+        "class": class_name,
+        "eager": bool(config.get("eager", False)),
+        "timeout": config.get("timeout", DEFAULT_PLUGIN_TIMEOUT),
+        "after": config.get("after", []),
+    }
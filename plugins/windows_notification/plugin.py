@@ -16,7 +16,16 @@ class WindowsNotificationPlugin(AlarmPlugin):
             host = self.config.get('host', 'localhost')
             port = self.config.get('port', 5000)
             logger.debug("Configuring client with host=%s, port=%s", host, port)
-            self.client = NotificationClient(host=host, port=port)
+            # In async mode notifications are queued and sent in the
+            # background, so an unreachable desktop never delays the alarm
+            self.client = NotificationClient(
+                host=host,
+                port=port,
+                timeout=self.config.get('request_timeout', 5.0),
+                background=self.config.get('async', False),
+                max_retries=self.config.get('max_retries', 3),
+                ttl=self.config.get('ttl', 120.0)
+            )
             logger.info("Windows notification plugin initialized successfully")
             return True
         except Exception as e:
@@ -35,7 +44,9 @@ class WindowsNotificationPlugin(AlarmPlugin):
                 message = context['message']
             logger.debug("Sending notification: %s", message)
             result = self.client.send_notification(message)
-            if result:
+            if result and self.client.background:
+                logger.info("Queued notification for alarm %s", alarm_id)
+            elif result:
                 logger.info("Successfully sent notification for alarm %s", alarm_id)
             else:
                 logger.warning("Failed to send notification for alarm %s", alarm_id)
@@ -46,4 +57,5 @@ class WindowsNotificationPlugin(AlarmPlugin):
     
     def cleanup(self) -> None:
         """Clean up resources."""
-        pass 
\ No newline at end of file
+        logger.debug("Notification stats: %s", self.client.get_stats())
+        self.client.close() 
\ No newline at end of file
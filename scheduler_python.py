@@ -1,19 +1,26 @@
 from datetime import datetime, timedelta
 from pathlib import Path
+import sys
 import threading
 import time
 import queue
 import subprocess
-from typing import Dict, Optional, Union, List
+from typing import Any, Dict, Optional, Tuple, Union, List
 import heapq
+import bisect
+import itertools
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import tempfile
 import os
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import json
 import urllib.parse
 from plugins.plugin_manager import PluginManager
+from alarm_journal import AlarmJournal
 
 # Add near the top after imports
 logging.basicConfig(
@@ -21,23 +28,196 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Longest the scheduler loop sleeps without being woken. Trigger times are
+# wall clock times, and the Pi has no RTC, so the clock can jump (e.g. on NTP
+# sync) without anything notifying the loop.
+MAX_IDLE_WAIT = 60  # seconds
+
+# Cancelled tasks are left in the heap and skipped when they reach the top.
+# The heap is rebuilt once they make up more than half of it.
+MIN_HEAP_COMPACT_SIZE = 64
+
+# Seconds before an alarm fires that its plugins are prepared
+DEFAULT_PREPARE_LEAD = 30
+
+# Default number of alarm tasks executed at the same time
+DEFAULT_MAX_WORKERS = 2
+
+# Format of time specs in the API and the journal
+TIME_SPEC_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# What to do on startup with journaled alarms that were due while the
+# scheduler was down: "fire" them if missed by at most the grace period,
+# or "skip" them all
+CATCH_UP_POLICIES = ("fire", "skip")
+DEFAULT_CATCH_UP_GRACE = 3600  # seconds
+
+# Longest a mutation waits for its journal record to reach the disk
+JOURNAL_WAIT_TIMEOUT = 10  # seconds
+
+# API requests handled at the same time. Open connections between requests
+# don't count, so idle kept-alive clients can't hold up the others.
+DEFAULT_MAX_REQUESTS = 16
+# Seconds a request waits for a free slot before it gets a 503
+REQUEST_SLOT_WAIT = 5
+# Seconds an idle kept-alive API connection is held open
+KEEPALIVE_TIMEOUT = 15
+
+# Page size of GET /alarms when no limit is given, and the largest allowed
+DEFAULT_LIST_LIMIT = 100
+MAX_LIST_LIMIT = 500
+
+# Alarm events kept for GET /events; a client further behind than this
+# gets a truncated reply and should resync from GET /alarms
+EVENT_LOG_SIZE = 1000
+# Longest a GET /events long poll is held open
+MAX_EVENT_WAIT = 60  # seconds
+# GET /events long polls held at the same time. They don't count against
+# max_requests, so pollers can't starve mutations.
+MAX_EVENT_POLLS = 4
+# Event type published for each journaled operation
+EVENT_TYPES = {
+    "create": "created",
+    "modify": "modified",
+    "snooze": "snoozed",
+    "cancel": "cancelled",
+}
+
+# Operations accepted by apply_batch
+BATCH_OPS = ("create", "modify", "cancel", "snooze")
+
+
+class NotDurableError(Exception):
+    """A mutation was applied but its journal record is not on disk.
+
+    The alarm is scheduled, or moved or cancelled, in memory and the journal
+    keeps retrying the write. If the scheduler restarts before that
+    succeeds, the change is lost. The API answers with 500 and
+    {"success": true, "durable": false}.
+    """
+
+    def __init__(self, seq: int, results: Optional[List[Dict[str, Any]]] = None):
+        super().__init__("journal record %d not written" % seq)
+        self.results = results
+
 
 @dataclass(order=True)
 class AlarmTask:
     trigger_time: datetime
     alarm_id: str
     command: str
+    # Plugins to run when the alarm fires, None for all
+    plugin_list: Optional[List[str]] = field(default=None, compare=False)
+    # Set when the task is cancelled or replaced while still in the heap
+    cancelled: bool = field(default=False, compare=False)
+    # Plugin manager preparation id, set once its plugins were asked to
+    # prepare
+    preparation: Optional[int] = field(default=None, compare=False)
 
     def __post_init__(self):
         # Make sure alarm_id isn't used in sorting
         self.sort_index = self.trigger_time
 
 
+class AlarmTaskExecutor:
+    """Bounded worker pool for alarm tasks with queue statistics."""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        """Initialize the executor.
+
+        Args:
+            max_workers: Maximum number of tasks running at the same time
+        """
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="alarm-task"
+        )
+        self.max_workers = max_workers
+        self.stats_lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def submit(self, fn, *args):
+        """Queue a call without waiting for a free worker."""
+        with self.stats_lock:
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        self.executor.submit(self._run, time.monotonic(), fn, *args)
+
+    def _run(self, queued_at: float, fn, *args):
+        wait = time.monotonic() - queued_at
+        with self.stats_lock:
+            self.queued -= 1
+            self.running += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.error("Unhandled error in alarm task: %s", e, exc_info=True)
+        finally:
+            with self.stats_lock:
+                self.running -= 1
+                self.completed += 1
+
+    def get_stats(self) -> Dict[str, Union[int, float]]:
+        """Get queue depth and wait time counters.
+
+        Returns:
+            Dict with current and maximum queue depth, running and completed
+            task counts, and average and maximum queue wait in seconds
+        """
+        with self.stats_lock:
+            started = self.completed + self.running
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self.queued,
+                "max_queue_depth": self.max_queue_depth,
+                "running": self.running,
+                "completed": self.completed,
+                "avg_wait": self.total_wait / started if started else 0.0,
+                "max_wait": self.max_wait,
+            }
+
+    def shutdown(self):
+        """Stop accepting tasks, letting queued ones finish in the background."""
+        self.executor.shutdown(wait=False)
+
+
 class AlarmSchedulerPython:
     def __init__(
-        self, host="localhost", port=8080, plugins_dir: Path = Path("plugins")
+        self,
+        host="localhost",
+        port=8080,
+        plugins_dir: Path = Path("plugins"),
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        journal_path: Optional[Path] = Path("alarm_journal.jsonl"),
+        catch_up_policy: str = "fire",
+        catch_up_grace: int = DEFAULT_CATCH_UP_GRACE,
+        max_requests: int = DEFAULT_MAX_REQUESTS,
+        prepare_lead: float = DEFAULT_PREPARE_LEAD,
     ):
-        """Initialize the Python-based Alarm Scheduler."""
+        """Initialize the Python-based Alarm Scheduler.
+
+        Args:
+            host: Hostname for the API server
+            port: Port for the API server
+            plugins_dir: Directory to discover plugins in
+            max_workers: Maximum number of alarm tasks executing at once
+            journal_path: Journal that makes scheduled alarms survive a
+                restart, or None to keep them in memory only
+            catch_up_policy: "fire" or "skip" for alarms missed while down
+            catch_up_grace: Seconds an alarm may have been missed by and
+                still be fired under the "fire" policy
+            max_requests: Maximum number of API requests handled at once
+            prepare_lead: Seconds before an alarm fires that its plugins
+                are prepared, 0 to not prepare them
+        """
+        if catch_up_policy not in CATCH_UP_POLICIES:
+            raise ValueError("Unknown catch-up policy: %s" % catch_up_policy)
         logger.debug(
             "Initializing scheduler on %s:%s with plugins from %s",
             host,
@@ -48,9 +228,39 @@ class AlarmSchedulerPython:
         self.temp_dir.mkdir(exist_ok=True)
 
         # Initialize task management
-        self.tasks: List[AlarmTask] = []
+        self.tasks: List[AlarmTask] = []  # Heap, may hold cancelled tasks
+        self.task_index: Dict[str, AlarmTask] = {}  # Active task per alarm_id
+        # Active tasks as (trigger_time, alarm_id), sorted, for range queries.
+        # Inserts and deletes shift the list, O(n) but a memmove: about 20us
+        # at 100k alarms, well below the journal fsync every mutation waits
+        # for, so a tree isn't worth a dependency.
+        self.schedule: List[Tuple[datetime, str]] = []
+        self.cancelled_count = 0
         self.task_lock = threading.Lock()
-        self.task_event = threading.Event()
+        # Notified whenever the earliest task changes
+        self.task_changed = threading.Condition(self.task_lock)
+        self.prepare_lead = timedelta(seconds=prepare_lead)
+        # When the scheduler loop wakes up next if not notified
+        self.next_wakeup = datetime.min
+
+        # Recent alarm events for long-polling clients. Sequence numbers
+        # restart with the scheduler, stream_id tells clients it restarted.
+        self.stream_id = uuid.uuid4().hex
+        self.events: deque = deque(maxlen=EVENT_LOG_SIZE)
+        self.event_seq = 0
+        self.event_added = threading.Condition()
+
+        # Due tasks run on a bounded pool so the loop never waits on plugins
+        self.executor = AlarmTaskExecutor(max_workers)
+
+        # Restore the alarms scheduled before the last shutdown
+        self.journal = AlarmJournal(journal_path) if journal_path else None
+        if self.journal is not None:
+            self._recover_tasks(catch_up_policy, catch_up_grace)
+
+        # Initialize plugin system before recovered alarms can fire
+        self.plugin_manager = PluginManager(plugins_dir)
+        self.plugin_manager.discover_plugins()
 
         # Start scheduler thread
         self.running = True
@@ -60,48 +270,226 @@ class AlarmSchedulerPython:
         self.scheduler_thread.start()
 
         # Start API server
-        self.server = AlarmAPIServer((host, port), AlarmRequestHandler, scheduler=self)
+        self.server = AlarmAPIServer(
+            (host, port),
+            AlarmRequestHandler,
+            scheduler=self,
+            max_requests=max_requests,
+        )
         self.server_thread = threading.Thread(
             target=self.server.serve_forever, daemon=True
         )
         self.server_thread.start()
 
-        # Initialize plugin system
-        self.plugin_manager = PluginManager(plugins_dir)
-        self.plugin_manager.discover_plugins()
-
         logger.info("Alarm scheduler started on %s:%s", host, port)
 
+    def _recover_tasks(self, catch_up_policy: str, catch_up_grace: int):
+        """Schedule the alarms replayed from the journal."""
+        now = datetime.now()
+        for alarm_id, alarm in self.journal.replay().items():
+            trigger_time = datetime.strptime(alarm["trigger_time"], TIME_SPEC_FORMAT)
+            if trigger_time <= now:
+                missed_by = (now - trigger_time).total_seconds()
+                if catch_up_policy == "skip" or missed_by > catch_up_grace:
+                    logger.warning(
+                        "Skipping alarm %s missed by %ds", alarm_id, missed_by
+                    )
+                    self.journal.append("skip", alarm_id)
+                    continue
+                logger.warning(
+                    "Catching up alarm %s missed by %ds", alarm_id, missed_by
+                )
+            self._add_task(
+                AlarmTask(
+                    trigger_time, alarm_id, alarm["command"], alarm.get("plugin_list")
+                )
+            )
+        logger.info("Recovered %d alarms from journal", len(self.task_index))
+
+    def _journal(self, op: str, alarm_id: str, **fields) -> int:
+        """Record a mutation in the journal. Must be called with task_lock held.
+
+        Returns:
+            int: Sequence number to pass to _wait_journal
+        """
+        if self.journal is None:
+            return 0
+        return self.journal.append(op, alarm_id, **fields)
+
+    def _wait_journal(self, seq: int) -> bool:
+        """Wait, without task_lock held, until a journal record is durable.
+
+        Returns:
+            bool: False if the record could not be written in time. The
+                mutation is still applied, and the journal keeps retrying.
+        """
+        if self.journal is None or not seq:
+            return True
+        if self.journal.wait_durable(seq, JOURNAL_WAIT_TIMEOUT):
+            return True
+        logger.error("Journal record %d not written: %s", seq, self.journal.error)
+        return False
+
+    def _require_durable(self, seq: int):
+        """Like _wait_journal, but raise NotDurableError if not durable."""
+        if not self._wait_journal(seq):
+            raise NotDurableError(seq)
+
+    def _publish(self, event_type: str, alarm_id: str, trigger_time=None):
+        """Append an alarm event to the event log and wake long polls."""
+        with self.event_added:
+            self.event_seq += 1
+            self.events.append(
+                {
+                    "seq": self.event_seq,
+                    "type": event_type,
+                    "alarm_id": alarm_id,
+                    "trigger_time": trigger_time.isoformat() if trigger_time else None,
+                    "time": datetime.now().isoformat(),
+                }
+            )
+            self.event_added.notify_all()
+
     def _scheduler_loop(self):
-        """Main scheduler loop that checks and executes tasks."""
+        """Main scheduler loop that sleeps until the next task is due."""
         logger.debug("Starting scheduler loop")
-        while self.running:
-            now = datetime.now()
-            with self.task_lock:
-                if self.tasks:
-                    logger.debug(
-                        "Current time: %s, Next task: %s",
-                        now,
-                        self.tasks[0].trigger_time,
-                    )
-                while self.tasks and self.tasks[0].trigger_time <= now:
-                    task = heapq.heappop(self.tasks)
+        with self.task_changed:
+            while self.running:
+                now = datetime.now()
+                task = self._next_task()
+                while task is not None and task.trigger_time <= now:
+                    heapq.heappop(self.tasks)
+                    del self.task_index[task.alarm_id]
+                    self._unlist_task(task)
                     logger.info("Task %s due for execution", task.alarm_id)
-                    threading.Thread(target=self._execute_task, args=(task,)).start()
-            time.sleep(1)
+                    self._publish("fired", task.alarm_id, task.trigger_time)
+                    self.executor.submit(self._execute_task, task)
+                    task = self._next_task()
+
+                timeout = MAX_IDLE_WAIT
+                if task is not None:
+                    next_in = (task.trigger_time - now).total_seconds()
+                    timeout = min(timeout, next_in)
+                    logger.debug("Next task %s at %s", task.alarm_id, task.trigger_time)
+                prepare_in = self._prepare_due(now)
+                if prepare_in is not None:
+                    timeout = min(timeout, prepare_in)
+                self.next_wakeup = now + timedelta(seconds=timeout)
+                self.task_changed.wait(timeout)
         logger.debug("Scheduler loop ended")
 
+    def _prepare_due(self, now: datetime) -> Optional[float]:
+        """Prepare the tasks firing within the lead time.
+
+        Must be called with task_lock held.
+
+        Returns:
+            float: Seconds until the next task is due to be prepared, or
+                None if there is none
+        """
+        if not self.prepare_lead:
+            return None
+        horizon = now + self.prepare_lead
+        for trigger_time, alarm_id in self.schedule:
+            if trigger_time > horizon:
+                return (trigger_time - horizon).total_seconds()
+            task = self.task_index[alarm_id]
+            if task.preparation is None:
+                task.preparation = self.plugin_manager.prepare_all(
+                    alarm_id,
+                    task.plugin_list,
+                    {"trigger_time": trigger_time.isoformat()},
+                )
+        return None
+
+    def _wake_to_prepare(self, task: AlarmTask):
+        """Wake the scheduler loop if a new task is due to be prepared first.
+
+        Must be called with task_lock held.
+        """
+        if (
+            self.prepare_lead
+            and task.trigger_time - self.prepare_lead < self.next_wakeup
+        ):
+            self.task_changed.notify()
+
+    def _release(self, task: Optional[AlarmTask]):
+        """Release the plugins of a task that is replaced or cancelled.
+
+        Must be called with task_lock held.
+        """
+        if task is not None and task.preparation is not None:
+            self.plugin_manager.release_all(task.preparation)
+
+    def _next_task(self) -> Optional[AlarmTask]:
+        """Get the earliest task. Must be called with task_lock held."""
+        while self.tasks and self.tasks[0].cancelled:
+            heapq.heappop(self.tasks)
+            self.cancelled_count -= 1
+        return self.tasks[0] if self.tasks else None
+
+    def _add_task(self, task: AlarmTask):
+        """Add a task, replacing any task with the same alarm_id.
+
+        Must be called with task_lock held.
+        """
+        self._remove_task(task.alarm_id)
+        self.task_index[task.alarm_id] = task
+        heapq.heappush(self.tasks, task)
+        bisect.insort(self.schedule, (task.trigger_time, task.alarm_id))
+
+    def _remove_task(self, alarm_id: str) -> Optional[AlarmTask]:
+        """Remove the task of an alarm. Must be called with task_lock held.
+
+        Returns:
+            The removed task, or None if the alarm has no task
+        """
+        task = self.task_index.pop(alarm_id, None)
+        if task is None:
+            return None
+        self._unlist_task(task)
+        task.cancelled = True
+        self.cancelled_count += 1
+        if len(self.tasks) > MIN_HEAP_COMPACT_SIZE and self.cancelled_count * 2 > len(
+            self.tasks
+        ):
+            self.tasks = [t for t in self.tasks if not t.cancelled]
+            heapq.heapify(self.tasks)
+            self.cancelled_count = 0
+        return task
+
+    def _unlist_task(self, task: AlarmTask):
+        """Drop a task from the schedule. Must be called with task_lock held."""
+        index = bisect.bisect_left(self.schedule, (task.trigger_time, task.alarm_id))
+        del self.schedule[index]
+
+    def _wake_if_changed(self, previous_next: Optional[AlarmTask]):
+        """Wake the scheduler loop if the earliest task changed.
+
+        Must be called with task_lock held.
+        """
+        if self._next_task() is not previous_next:
+            self.task_changed.notify()
+
     def _execute_task(self, task: AlarmTask):
         """Execute a task using the plugin system."""
         logger.info("Executing task %s", task.alarm_id)
         try:
-            self.plugin_manager.execute_all(
-                task.alarm_id,
-                task.plugin_list if hasattr(task, "plugin_list") else None,
-            )
-            logger.debug("Task %s execution completed", task.alarm_id)
+            results = self.plugin_manager.execute_all(task.alarm_id, task.plugin_list)
+            logger.debug("Task %s execution completed: %s", task.alarm_id, results)
         except Exception as e:
             logger.error("Error executing task %s: %s", task.alarm_id, e, exc_info=True)
+        if task.preparation is not None:
+            self.plugin_manager.release_all(task.preparation)
+
+        # Only now, so an alarm interrupted by a power loss is caught up
+        with self.task_lock:
+            seq = self._journal(
+                "fired",
+                task.alarm_id,
+                trigger_time=task.trigger_time.strftime(TIME_SPEC_FORMAT),
+            )
+        self._wait_journal(seq)
 
     def _cleanup_task(self, alarm_id: str):
         """Clean up any resources associated with a task."""
@@ -109,20 +497,92 @@ class AlarmSchedulerPython:
         if script_path.exists():
             script_path.unlink()
 
-    def create_systemd_timer(self, alarm_id: str, time_spec: str, command: str) -> bool:
-        """Schedule a new alarm task."""
+    def _create_locked(
+        self,
+        alarm_id: str,
+        trigger_time: datetime,
+        command: str,
+        plugin_list: Optional[List[str]] = None,
+    ) -> int:
+        """Schedule an alarm. Must be called with task_lock held.
+
+        Returns:
+            int: Journal sequence number
+        """
+        self._release(self.task_index.get(alarm_id))
+        task = AlarmTask(trigger_time, alarm_id, command, plugin_list)
+        self._add_task(task)
+        self._wake_to_prepare(task)
+        self._publish("created", alarm_id, trigger_time)
+        return self._journal(
+            "create",
+            alarm_id,
+            trigger_time=trigger_time.strftime(TIME_SPEC_FORMAT),
+            command=command,
+            plugin_list=plugin_list,
+        )
+
+    def _reschedule_locked(
+        self, alarm_id: str, new_time: datetime, op: str
+    ) -> Optional[int]:
+        """Move an alarm to a new time. Must be called with task_lock held.
+
+        Returns:
+            int: Journal sequence number, or None if the alarm is unknown
+        """
+        old_task = self.task_index.get(alarm_id)
+        if not old_task:
+            return None
+        # Create new task with updated time
+        task = AlarmTask(new_time, alarm_id, old_task.command, old_task.plugin_list)
+        if (
+            old_task.preparation is not None
+            and new_time - self.prepare_lead <= datetime.now()
+        ):
+            # Still within the lead time, keep the plugins prepared
+            task.preparation = old_task.preparation
+        else:
+            self._release(old_task)
+        self._add_task(task)
+        self._wake_to_prepare(task)
+        self._publish(EVENT_TYPES[op], alarm_id, new_time)
+        return self._journal(
+            op, alarm_id, trigger_time=new_time.strftime(TIME_SPEC_FORMAT)
+        )
+
+    def _cancel_locked(self, alarm_id: str) -> int:
+        """Cancel an alarm. Must be called with task_lock held.
+
+        Returns:
+            int: Journal sequence number, 0 if there was nothing to cancel
+        """
+        task = self._remove_task(alarm_id)
+        if task is None:
+            return 0
+        self._release(task)
+        self._publish("cancelled", alarm_id)
+        return self._journal("cancel", alarm_id)
+
+    def create_systemd_timer(
+        self,
+        alarm_id: str,
+        time_spec: str,
+        command: str,
+        plugin_list: Optional[List[str]] = None,
+    ) -> bool:
+        """Schedule a new alarm task, running plugin_list or all plugins."""
         try:
-            trigger_time = datetime.strptime(time_spec, "%Y-%m-%d %H:%M:%S")
-            task = AlarmTask(trigger_time, alarm_id, command)
+            trigger_time = datetime.strptime(time_spec, TIME_SPEC_FORMAT)
 
             with self.task_lock:
-                # Remove any existing task with same ID
-                self.tasks = [t for t in self.tasks if t.alarm_id != alarm_id]
-                heapq.heappush(self.tasks, task)
-                heapq.heapify(self.tasks)
+                previous_next = self._next_task()
+                seq = self._create_locked(alarm_id, trigger_time, command, plugin_list)
+                self._wake_if_changed(previous_next)
 
-            self.task_event.set()
+            self._require_durable(seq)
             return True
+        except NotDurableError:
+            raise
         except Exception as e:
             logger.error("Error creating alarm %s: %s", alarm_id, e)
             return False
@@ -130,38 +590,41 @@ class AlarmSchedulerPython:
     def modify_alarm_time(self, alarm_id: str, new_time_spec: str) -> bool:
         """Modify the time of an existing alarm."""
         try:
-            new_time = datetime.strptime(new_time_spec, "%Y-%m-%d %H:%M:%S")
-
-            with self.task_lock:
-                # Find the existing task
-                old_task = None
-                for task in self.tasks:
-                    if task.alarm_id == alarm_id:
-                        old_task = task
-                        break
-
-                if old_task:
-                    # Create new task with updated time
-                    new_task = AlarmTask(new_time, alarm_id, old_task.command)
-                    self.tasks.remove(old_task)
-                    heapq.heappush(self.tasks, new_task)
-                    heapq.heapify(self.tasks)
-                    return True
-
-            return False
+            new_time = datetime.strptime(new_time_spec, TIME_SPEC_FORMAT)
+            return self._reschedule(alarm_id, new_time, "modify")
+        except NotDurableError:
+            raise
         except Exception as e:
             logger.error("Error modifying alarm %s: %s", alarm_id, e)
             return False
 
+    def _reschedule(self, alarm_id: str, new_time: datetime, op: str) -> bool:
+        """Move an existing alarm to a new time, journaled as op."""
+        with self.task_lock:
+            previous_next = self._next_task()
+            seq = self._reschedule_locked(alarm_id, new_time, op)
+            self._wake_if_changed(previous_next)
+
+        if seq is None:
+            return False
+        self._require_durable(seq)
+        return True
+
     def cancel_alarm(self, alarm_id: str) -> bool:
         """Cancel an alarm task."""
         try:
             with self.task_lock:
-                self.tasks = [t for t in self.tasks if t.alarm_id != alarm_id]
-                heapq.heapify(self.tasks)
+                previous_next = self._next_task()
+                seq = self._cancel_locked(alarm_id)
+                self._wake_if_changed(previous_next)
 
-            self._cleanup_task(alarm_id)
+            try:
+                self._require_durable(seq)
+            finally:
+                self._cleanup_task(alarm_id)
             return True
+        except NotDurableError:
+            raise
         except Exception as e:
             logger.error("Error canceling alarm %s: %s", alarm_id, e)
             return False
@@ -169,87 +632,450 @@ class AlarmSchedulerPython:
     def snooze_alarm(self, alarm_id: str, snooze_seconds: int = 540) -> bool:
         """Snooze an alarm for specified seconds."""
         try:
-            new_time = datetime.now() + timedelta(seconds=snooze_seconds)
-            time_spec = new_time.strftime("%Y-%m-%d %H:%M:%S")
-            return self.modify_alarm_time(alarm_id, time_spec)
+            return self._reschedule(alarm_id, _snooze_time(snooze_seconds), "snooze")
+        except NotDurableError:
+            raise
         except Exception as e:
             logger.error("Error snoozing alarm %s: %s", alarm_id, e)
             return False
 
+    def apply_batch(
+        self, operations: List[Dict[str, Any]]
+    ) -> Tuple[bool, List[Dict[str, Any]]]:
+        """Apply several create/modify/cancel/snooze operations at once.
+
+        All operations are validated first; if any is malformed none is
+        applied. The valid ones are applied in order under a single lock
+        acquisition, so the scheduler loop never sees a partial batch.
+
+        Args:
+            operations: Dicts with "op" and "alarm_id", plus the arguments of
+                the matching endpoint ("time_spec", "command" and optional
+                "plugin_list" for create, "new_time_spec" for modify,
+                optional "snooze_seconds")
+
+        Raises:
+            TypeError: If operations is not a list
+            NotDurableError: If the batch was applied but not written to
+                the journal in time, with the per-operation results
+
+        Returns:
+            Tuple of whether the batch was applied and one result dict per
+            operation with "op", "alarm_id", "success" and maybe "error"
+        """
+        if not isinstance(operations, list):
+            raise TypeError("operations must be a list")
+        results = []
+        parsed = []
+        for operation in operations:
+            if not isinstance(operation, dict):
+                results.append(
+                    {
+                        "op": None,
+                        "alarm_id": None,
+                        "success": False,
+                        "error": "Invalid operation: not an object",
+                    }
+                )
+                continue
+            result = {
+                "op": operation.get("op"),
+                "alarm_id": operation.get("alarm_id"),
+                "success": False,
+            }
+            try:
+                parsed.append(_parse_operation(operation))
+            except (KeyError, TypeError, ValueError) as e:
+                result["error"] = "Invalid operation: %s" % e
+            results.append(result)
+        if len(parsed) < len(operations):
+            logger.error("Rejecting batch with invalid operations")
+            return False, results
+
+        seq = 0
+        cancelled = []
+        with self.task_lock:
+            previous_next = self._next_task()
+            for result, (op, alarm_id, trigger_time, command, plugin_list) in zip(
+                results, parsed
+            ):
+                if op == "create":
+                    seq = self._create_locked(
+                        alarm_id, trigger_time, command, plugin_list
+                    )
+                elif op == "cancel":
+                    seq = self._cancel_locked(alarm_id) or seq
+                    cancelled.append(alarm_id)
+                else:
+                    op_seq = self._reschedule_locked(alarm_id, trigger_time, op)
+                    if op_seq is None:
+                        result["error"] = "Unknown alarm"
+                        continue
+                    seq = op_seq
+                result["success"] = True
+            self._wake_if_changed(previous_next)
+
+        durable = self._wait_journal(seq)
+        for alarm_id in cancelled:
+            self._cleanup_task(alarm_id)
+        logger.info("Applied batch of %d operations", len(operations))
+        if not durable:
+            raise NotDurableError(seq, results)
+        return True, results
+
     def get_alarm_status(self, alarm_id: str) -> Dict[str, Union[bool, Optional[str]]]:
         """Get the status of an alarm."""
         try:
             with self.task_lock:
-                for task in self.tasks:
-                    if task.alarm_id == alarm_id:
-                        return {
-                            "active": True,
-                            "next_trigger": task.trigger_time.isoformat(),
-                        }
+                task = self.task_index.get(alarm_id)
+                if task is not None:
+                    return {
+                        "active": True,
+                        "next_trigger": task.trigger_time.isoformat(),
+                    }
 
             return {"active": False, "next_trigger": None}
         except Exception as e:
             logger.error("Error getting alarm status %s: %s", alarm_id, e)
             return {"active": False, "next_trigger": None}
 
+    def list_alarms(
+        self,
+        from_time: Optional[datetime] = None,
+        until_time: Optional[datetime] = None,
+        limit: int = DEFAULT_LIST_LIMIT,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """List scheduled alarms in trigger time order.
+
+        Args:
+            from_time: Only alarms triggering at or after this time
+            until_time: Only alarms triggering before this time
+            limit: Maximum number of alarms to return, up to MAX_LIST_LIMIT
+            cursor: The next_cursor of the previous page
+
+        Returns:
+            Dict with "alarms", each with "alarm_id" and "next_trigger", and
+            "next_cursor" to pass for the next page, None on the last page
+
+        Raises:
+            ValueError: If the limit or cursor is invalid
+        """
+        if not 1 <= limit <= MAX_LIST_LIMIT:
+            raise ValueError("limit must be between 1 and %d" % MAX_LIST_LIMIT)
+        after = _parse_cursor(cursor) if cursor else None
+
+        with self.task_lock:
+            start = 0
+            if from_time is not None:
+                start = bisect.bisect_left(self.schedule, (from_time,))
+            if after is not None:
+                start = max(start, bisect.bisect_right(self.schedule, after))
+            end = len(self.schedule)
+            if until_time is not None:
+                end = bisect.bisect_left(self.schedule, (until_time,))
+            page = self.schedule[start : min(end, start + limit)]
+            more = start + limit < end
+
+        return {
+            "alarms": [
+                {"alarm_id": alarm_id, "next_trigger": trigger_time.isoformat()}
+                for trigger_time, alarm_id in page
+            ],
+            "next_cursor": _make_cursor(*page[-1]) if more else None,
+        }
+
+    def wait_events(self, since: int = 0, timeout: float = 0) -> Dict[str, Any]:
+        """Get the alarm events after a sequence number, waiting for one.
+
+        Args:
+            since: Sequence number of the last event the caller has seen
+            timeout: Seconds to wait if there is no newer event yet, capped
+                at MAX_EVENT_WAIT
+
+        Returns:
+            Dict with "stream_id", "events" (each with "seq", "type",
+            "alarm_id", "trigger_time" and "time"), "last_seq" to pass as
+            since next time, and "truncated" if events after since were
+            dropped from the log or since is from another stream
+        """
+        timeout = max(0, min(timeout, MAX_EVENT_WAIT))
+        with self.event_added:
+            self.event_added.wait_for(
+                lambda: self.event_seq != since or not self.running, timeout
+            )
+            truncated = since > self.event_seq
+            if truncated:
+                since = 0
+            first_seq = self.event_seq - len(self.events) + 1
+            truncated = truncated or since + 1 < first_seq
+            skip = max(0, since + 1 - first_seq)
+            events = list(itertools.islice(self.events, skip, None))
+            return {
+                "stream_id": self.stream_id,
+                "events": events,
+                "last_seq": self.event_seq,
+                "truncated": truncated,
+            }
+
+    def get_executor_stats(self) -> Dict[str, Union[int, float]]:
+        """Get queue depth and wait time counters of the task executor."""
+        return self.executor.get_stats()
+
     def shutdown(self):
         """Shutdown the scheduler and cleanup plugins."""
-        self.running = False
+        with self.task_changed:
+            self.running = False
+            self.task_changed.notify_all()
+        with self.event_added:
+            self.event_added.notify_all()
+        self.executor.shutdown()
+        if self.journal is not None:
+            self.journal.close()
         self.plugin_manager.cleanup()
         self.server.shutdown()
         self.server.server_close()
 
 
+def _snooze_time(snooze_seconds: int) -> datetime:
+    """Get the trigger time of an alarm snoozed now, in whole seconds."""
+    new_time = datetime.now() + timedelta(seconds=snooze_seconds)
+    return new_time.replace(microsecond=0)
+
+
+def _make_cursor(trigger_time: datetime, alarm_id: str) -> str:
+    """Build the list cursor pointing just past an alarm."""
+    return "%s|%s" % (trigger_time.isoformat(), alarm_id)
+
+
+def _parse_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Split a list cursor into trigger time and alarm_id.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    time_str, separator, alarm_id = cursor.partition("|")
+    if not separator:
+        raise ValueError("invalid cursor")
+    return _parse_query_time(time_str), alarm_id
+
+
+def _parse_query_time(value: str) -> datetime:
+    """Parse a local ISO time from a query string.
+
+    Raises:
+        ValueError: If the value is not a local ISO time
+    """
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        raise ValueError("times must be local, without UTC offset")
+    return parsed
+
+
+def _parse_operation(
+    operation: Dict[str, Any],
+) -> Tuple[str, str, Optional[datetime], Optional[str], Optional[List[str]]]:
+    """Validate a batch operation.
+
+    Returns:
+        Tuple of op, alarm_id, trigger time, command and plugin list
+
+    Raises:
+        KeyError, TypeError, ValueError: If the operation is malformed
+    """
+    op = operation["op"]
+    alarm_id = operation["alarm_id"]
+    if not isinstance(alarm_id, str):
+        raise TypeError("alarm_id must be a string")
+    if op == "create":
+        trigger_time = datetime.strptime(operation["time_spec"], TIME_SPEC_FORMAT)
+        plugin_list = operation.get("plugin_list")
+        if plugin_list is not None and not isinstance(plugin_list, list):
+            raise TypeError("plugin_list must be a list")
+        return op, alarm_id, trigger_time, operation["command"], plugin_list
+    if op == "modify":
+        new_time = datetime.strptime(operation["new_time_spec"], TIME_SPEC_FORMAT)
+        return op, alarm_id, new_time, None, None
+    if op == "snooze":
+        snooze_time = _snooze_time(operation.get("snooze_seconds", 540))
+        return op, alarm_id, snooze_time, None, None
+    if op == "cancel":
+        return op, alarm_id, None, None, None
+    raise ValueError("unknown op %r, expected one of %s" % (op, ", ".join(BATCH_OPS)))
+
+
 class AlarmRequestHandler(BaseHTTPRequestHandler):
+    # Keep connections alive for clients with a pooled session
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body are written separately, don't let Nagle hold the body
+    disable_nagle_algorithm = True
+
+    def _send_json(self, status: int, payload: Any, close: bool = False):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if close:
+            # Also sets close_connection
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _with_slot(self, slots: threading.BoundedSemaphore, handle, wait=True):
+        """Handle the request once a slot is free, or answer 503."""
+        if not slots.acquire(timeout=REQUEST_SLOT_WAIT if wait else 0):
+            # The request body is left unread, so the connection can't be
+            # reused for another request
+            self._send_json(503, {"success": False, "error": "Server busy"}, close=True)
+            return
+        try:
+            handle()
+        finally:
+            slots.release()
+
     def do_POST(self):
-        """Handle POST requests for creating/modifying alarms."""
-        content_length = int(self.headers["Content-Length"])
-        post_data = json.loads(self.rfile.read(content_length))
+        self._with_slot(self.server.request_slots, self._handle_post)
+
+    def do_GET(self):
+        if urllib.parse.urlparse(self.path).path == "/events":
+            self._with_slot(self.server.event_slots, self._handle_events, wait=False)
+        else:
+            self._with_slot(self.server.request_slots, self._handle_get)
+
+    def _handle_post(self):
+        """Handle POST requests for creating/modifying alarms.
+
+        Answers 200 if applied, 400 if malformed or refused (e.g. unknown
+        alarm), and 500 with "success": true and "durable": false if
+        applied but not written to the journal in time.
+        """
+        content_length = int(self.headers.get("Content-Length", 0))
+        try:
+            post_data = json.loads(self.rfile.read(content_length))
+        except ValueError:
+            self._send_json(400, {"success": False, "error": "Invalid JSON"})
+            return
 
         path = urllib.parse.urlparse(self.path).path
         scheduler = self.server.scheduler
 
         result = False
-        if path == "/create":
-            result = scheduler.create_systemd_timer(
-                post_data["alarm_id"], post_data["time_spec"], post_data["command"]
-            )
-        elif path == "/modify":
-            result = scheduler.modify_alarm_time(
-                post_data["alarm_id"], post_data["new_time_spec"]
-            )
-        elif path == "/cancel":
-            result = scheduler.cancel_alarm(post_data["alarm_id"])
-        elif path == "/snooze":
-            result = scheduler.snooze_alarm(
-                post_data["alarm_id"], post_data.get("snooze_seconds", 540)
-            )
+        response = {}
+        try:
+            if path == "/batch":
+                result, response["results"] = scheduler.apply_batch(
+                    post_data["operations"]
+                )
+            elif path == "/create":
+                result = scheduler.create_systemd_timer(
+                    post_data["alarm_id"],
+                    post_data["time_spec"],
+                    post_data["command"],
+                    post_data.get("plugin_list"),
+                )
+            elif path == "/modify":
+                result = scheduler.modify_alarm_time(
+                    post_data["alarm_id"], post_data["new_time_spec"]
+                )
+            elif path == "/cancel":
+                result = scheduler.cancel_alarm(post_data["alarm_id"])
+            elif path == "/snooze":
+                result = scheduler.snooze_alarm(
+                    post_data["alarm_id"], post_data.get("snooze_seconds", 540)
+                )
+        except (KeyError, TypeError) as e:
+            response["error"] = "Missing or invalid field: %s" % e
+        except NotDurableError as e:
+            # Applied, unlike the 400s
+            if e.results is not None:
+                response["results"] = e.results
+            response.update(success=True, durable=False, error=str(e))
+            self._send_json(500, response)
+            return
 
-        self.send_response(200 if result else 400)
-        self.send_header("Content-type", "application/json")
-        self.end_headers()
-        self.wfile.write(json.dumps({"success": result}).encode())
+        response["success"] = result
+        self._send_json(200 if result else 400, response)
 
-    def do_GET(self):
-        """Handle GET requests for alarm status."""
-        path_parts = urllib.parse.urlparse(self.path).path.split("/")
+    def _handle_get(self):
+        """Handle GET requests for alarm status, listing and stats."""
+        url = urllib.parse.urlparse(self.path)
+        path_parts = url.path.split("/")
         if len(path_parts) >= 3 and path_parts[1] == "status":
             alarm_id = path_parts[2]
             status = self.server.scheduler.get_alarm_status(alarm_id)
-
-            self.send_response(200)
-            self.send_header("Content-type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps(status).encode())
+            self._send_json(200, status)
+        elif path_parts[1:] == ["alarms"]:
+            query = dict(urllib.parse.parse_qsl(url.query))
+            try:
+                alarms = self.server.scheduler.list_alarms(
+                    from_time=(
+                        _parse_query_time(query["from"]) if "from" in query else None
+                    ),
+                    until_time=(
+                        _parse_query_time(query["until"]) if "until" in query else None
+                    ),
+                    limit=int(query.get("limit", DEFAULT_LIST_LIMIT)),
+                    cursor=query.get("cursor"),
+                )
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            self._send_json(200, alarms)
+        elif path_parts[1:] == ["stats"]:
+            stats = self.server.scheduler.get_executor_stats()
+            self._send_json(200, stats)
         else:
             self.send_response(404)
+            self.send_header("Content-Length", "0")
             self.end_headers()
 
+    def _handle_events(self):
+        """Handle GET /events long polls."""
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlparse(self.path).query))
+        try:
+            since = int(query.get("since", 0))
+            timeout = float(query.get("timeout", 0))
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        self._send_json(200, self.server.scheduler.wait_events(since, timeout))
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
 
-class AlarmAPIServer(HTTPServer):
-    def __init__(self, server_address, handler_class, scheduler):
+
+class AlarmAPIServer(ThreadingHTTPServer):
+    """API server handling each connection on its own thread.
+
+    Every connection is accepted. The number of requests handled at once is
+    capped by the handler, see AlarmRequestHandler._with_slot.
+    """
+
+    daemon_threads = True
+    # Room for a burst of clients connecting at once
+    request_queue_size = 64
+
+    def __init__(
+        self,
+        server_address,
+        handler_class,
+        scheduler,
+        max_requests: int = DEFAULT_MAX_REQUESTS,
+    ):
         super().__init__(server_address, handler_class)
         self.scheduler = scheduler
+        self.request_slots = threading.BoundedSemaphore(max_requests)
+        self.event_slots = threading.BoundedSemaphore(MAX_EVENT_POLLS)
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-request are expected, not worth a traceback
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            logger.debug("Client %s disconnected", client_address)
+        else:
+            logger.error(
+                "Error handling request from %s", client_address, exc_info=True
+            )
 
 
 if __name__ == "__main__":
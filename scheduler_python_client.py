@@ -1,18 +1,97 @@
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Union, List
+from typing import Any, Dict, Optional, Union, List
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import time
+
+# Seconds to wait for the connection and for each response read
+DEFAULT_CONNECT_TIMEOUT = 2.0
+DEFAULT_READ_TIMEOUT = 5.0
 
 
 class AlarmSchedulerPythonClient:
-    def __init__(self, host="localhost", port=8080):
+    def __init__(
+        self,
+        host="localhost",
+        port=8080,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        max_retries: int = 2,
+        retry_backoff: float = 0.1,
+        pool_size: int = 4,
+    ):
         """Initialize the client for Python-based Alarm Scheduler.
 
         Args:
             host: Hostname of the scheduler service
             port: Port number of the scheduler service
+            connect_timeout: Seconds to wait for a connection
+            read_timeout: Seconds to wait for a response
+            max_retries: Retries of idempotent calls after a connection
+                error, timeout or server error
+            retry_backoff: Seconds before the first retry, doubled per retry
+            pool_size: Number of kept-alive connections
         """
         self.base_url = f"http://{host}:{port}"
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.session = requests.Session()
+        self.session.mount(
+            "http://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        )
+        # Seconds taken by the last call, overall and per endpoint
+        self.last_latency: Optional[float] = None
+        self.latencies: Dict[str, float] = {}
+
+    def _request(
+        self, method: str, endpoint: str, idempotent: bool, **kwargs
+    ) -> requests.Response:
+        """Send a request on the pooled session.
+
+        Only idempotent calls are retried, since a retried snooze or batch
+        could be applied twice.
+
+        Args:
+            method: HTTP method
+            endpoint: Path below base_url, e.g. "/create"
+            idempotent: Whether the call may safely be repeated
+            **kwargs: Passed on to requests
+
+        Returns:
+            requests.Response: The response
+
+        Raises:
+            requests.RequestException: If the last attempt failed
+        """
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        name = endpoint.split("/")[1]
+        timeout = kwargs.pop("timeout", self.timeout)
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            start = time.monotonic()
+            try:
+                response = self.session.request(
+                    method,
+                    self.base_url + endpoint,
+                    timeout=timeout,
+                    **kwargs,
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt + 1 == attempts:
+                    raise
+                continue
+            finally:
+                self.last_latency = time.monotonic() - start
+                self.latencies[name] = self.last_latency
+            if response.status_code < 500 or attempt + 1 == attempts:
+                return response
+
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
 
     def create_systemd_timer(self, alarm_id: str, time_spec: str, command: str, plugin_list: List[str] = None) -> bool:
         """Schedule a new alarm task.
@@ -27,8 +106,10 @@ class AlarmSchedulerPythonClient:
             bool: True if successful, False otherwise
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/create",
+            response = self._request(
+                "POST",
+                "/create",
+                idempotent=True,
                 json={
                     "alarm_id": alarm_id,
                     "time_spec": time_spec,
@@ -36,7 +117,7 @@ class AlarmSchedulerPythonClient:
                     "plugin_list": plugin_list,
                 },
             )
-            return response.status_code == 200
+            return _applied(response)
         except Exception:
             return False
 
@@ -51,14 +132,16 @@ class AlarmSchedulerPythonClient:
             bool: True if successful, False otherwise
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/modify",
+            response = self._request(
+                "POST",
+                "/modify",
+                idempotent=True,
                 json={
                     "alarm_id": alarm_id,
                     "new_time_spec": new_time_spec,
                 },
             )
-            return response.status_code == 200
+            return _applied(response)
         except Exception:
             return False
 
@@ -72,11 +155,13 @@ class AlarmSchedulerPythonClient:
             bool: True if successful, False otherwise
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/cancel",
+            response = self._request(
+                "POST",
+                "/cancel",
+                idempotent=True,
                 json={"alarm_id": alarm_id},
             )
-            return response.status_code == 200
+            return _applied(response)
         except Exception:
             return False
 
@@ -91,17 +176,46 @@ class AlarmSchedulerPythonClient:
             bool: True if successful, False otherwise
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/snooze",
+            response = self._request(
+                "POST",
+                "/snooze",
+                idempotent=False,
                 json={
                     "alarm_id": alarm_id,
                     "snooze_seconds": snooze_seconds,
                 },
             )
-            return response.status_code == 200
+            return _applied(response)
         except Exception:
             return False
 
+    def apply_batch(self, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply several alarm operations in a single request.
+
+        Args:
+            operations: Dicts with "op" ("create", "modify", "cancel" or
+                "snooze"), "alarm_id" and the arguments of the matching
+                single-alarm method, e.g.
+                {"op": "create", "alarm_id": "a", "time_spec": "...", "command": "..."}
+
+        Returns:
+            List with one dict per operation holding "success" and, on
+            failure, "error". If the batch is rejected none was applied.
+        """
+        try:
+            response = self._request(
+                "POST",
+                "/batch",
+                idempotent=False,
+                json={"operations": operations},
+            )
+            return response.json()["results"]
+        except Exception:
+            return [
+                {"op": op.get("op"), "alarm_id": op.get("alarm_id"), "success": False}
+                for op in operations
+            ]
+
     def get_alarm_status(self, alarm_id: str) -> Dict[str, Union[bool, Optional[str]]]:
         """Get the status of an alarm.
 
@@ -112,9 +226,99 @@ class AlarmSchedulerPythonClient:
             Dict containing active status and next trigger time
         """
         try:
-            response = requests.get(f"{self.base_url}/status/{alarm_id}")
+            response = self._request("GET", f"/status/{alarm_id}", idempotent=True)
             if response.status_code == 200:
                 return response.json()
             return {"active": False, "next_trigger": None}
         except Exception:
             return {"active": False, "next_trigger": None}
+
+    def list_alarms(
+        self,
+        from_time: Optional[str] = None,
+        until_time: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """List scheduled alarms in trigger time order, one page at a time.
+
+        Args:
+            from_time: Only alarms triggering at or after this local time,
+                in "YYYY-MM-DD HH:MM:SS" or ISO format
+            until_time: Only alarms triggering before this local time
+            limit: Maximum number of alarms in the page
+            cursor: The "next_cursor" of the previous page
+
+        Returns:
+            Dict with "alarms", each holding "alarm_id" and "next_trigger",
+            and "next_cursor", None on the last page
+        """
+        params = {
+            "from": from_time,
+            "until": until_time,
+            "limit": limit,
+            "cursor": cursor,
+        }
+        try:
+            response = self._request(
+                "GET",
+                "/alarms",
+                idempotent=True,
+                params={k: v for k, v in params.items() if v is not None},
+            )
+            if response.status_code == 200:
+                return response.json()
+            return {"alarms": [], "next_cursor": None}
+        except Exception:
+            return {"alarms": [], "next_cursor": None}
+
+    def wait_events(self, since: int = 0, timeout: float = 30) -> Dict[str, Any]:
+        """Long-poll for alarm events after a sequence number.
+
+        Returns as soon as there are events newer than since, or after
+        timeout seconds with none. Pass the returned "last_seq" as since
+        on the next call. If "truncated" is set or "stream_id" changed,
+        events were missed and the schedule should be reloaded with
+        list_alarms.
+
+        Args:
+            since: Sequence number of the last event seen, 0 for all
+            timeout: Seconds the server may hold the request open
+
+        Returns:
+            Dict with "stream_id", "events" (each with "seq", "type",
+            "alarm_id", "trigger_time" and "time"), "last_seq" and
+            "truncated"
+        """
+        connect_timeout, read_timeout = self.timeout
+        try:
+            response = self._request(
+                "GET",
+                "/events",
+                idempotent=True,
+                params={"since": since, "timeout": timeout},
+                timeout=(connect_timeout, timeout + read_timeout),
+            )
+            if response.status_code == 200:
+                return response.json()
+        except Exception:
+            pass
+        return {"stream_id": None, "events": [], "last_seq": since, "truncated": False}
+
+
+def _applied(response: requests.Response) -> bool:
+    """Check whether the server applied a mutation.
+
+    A 500 with "durable": false was applied but not yet journaled, so it
+    would be lost if the scheduler restarted now. It still counts as
+    applied: the alarm is set.
+    """
+    if response.status_code == 200:
+        return True
+    if response.status_code != 500:
+        return False
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    return bool(body.get("success")) and body.get("durable") is False
@@ -24,9 +24,23 @@ source venv/bin/activate
 # Upgrade pip
 python -m pip install --upgrade pip
 
+# The local audio plugin plays plugins/local_audio/sounds/alarm.wav, or a
+# generated tone until a WAV file is put there
+mkdir -p plugins/local_audio/sounds
+
 # Install requirements
 echo "Installing dependencies..."
 pip install -r requirements.txt
 
+# ALSA output of the local audio plugin needs the ALSA headers to build;
+# without them the plugin can still use its file and null sinks
+if [ -f /usr/include/alsa/asoundlib.h ]; then
+    pip install -r plugins/local_audio/requirements.txt
+else
+    echo "ALSA headers not found (libasound2-dev), skipping local audio ALSA support"
+    echo "The local audio plugin stays silent until you install libasound2-dev and run:"
+    echo "pip install -r plugins/local_audio/requirements.txt"
+fi
+
 echo "Setup complete! To activate the virtual environment, run:"
 echo "source venv/bin/activate"
\ No newline at end of file
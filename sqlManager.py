@@ -1,9 +1,9 @@
 import sqlite3
 from datetime import datetime, timedelta
 import logging
-from typing import Optional, List
+from typing import Dict, Optional, List
 import pytz
-from event import Event
+from event import Event, get_timezone
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
@@ -12,7 +12,7 @@ logger = logging.getLogger(__name__)
 class sqlManager:
     def __init__(self, db_file: str, timezone: str) -> None:
         self.db_file: str = db_file
-        self.timezone: pytz.timezone = pytz.timezone(timezone)
+        self.timezone: pytz.timezone = get_timezone(timezone)
         try:
             self.conn: sqlite3.Connection = sqlite3.connect(db_file)
         except sqlite3.OperationalError:
@@ -31,34 +31,113 @@ class sqlManager:
                 start_time TEXT,
                 end_time TEXT,
                 title TEXT,
-                is_system_managed INTEGER DEFAULT 0  -- 0 = false, 1 = true
+                is_system_managed INTEGER DEFAULT 0,  -- 0 = false, 1 = true
+                start_epoch INTEGER,  -- UTC start in seconds since the epoch
+                end_epoch INTEGER  -- UTC end in seconds since the epoch
             )
         """)
+        self.migrate_epoch_columns()
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_events_start_epoch ON events (start_epoch)"
+        )
         self.conn.commit()
 
-    def store_alarms(self, events: List[Event]) -> int:
+    def migrate_epoch_columns(self) -> None:
+        """Add and backfill the epoch columns on databases created without them."""
         cursor: sqlite3.Cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM events")
-        self.conn.commit()
+        cursor.execute("PRAGMA table_info(events)")
+        columns = {row[1] for row in cursor.fetchall()}
+        if "start_epoch" in columns:
+            return
+
+        logger.info("Migrating events table to epoch start/end columns")
+        with self.conn:
+            cursor.execute("ALTER TABLE events ADD COLUMN start_epoch INTEGER")
+            cursor.execute("ALTER TABLE events ADD COLUMN end_epoch INTEGER")
+            # Stored dates and times are UTC, events ending before they start
+            # end on the next day
+            cursor.execute("""
+                UPDATE events SET
+                    start_epoch = CAST(strftime('%s', date || ' ' || start_time)
+                                       AS INTEGER),
+                    end_epoch = CAST(strftime('%s', date || ' ' || end_time)
+                                     AS INTEGER)
+                                + CASE WHEN end_time < start_time
+                                       THEN 86400 ELSE 0 END
+            """)
+
+    def store_alarms(self, events: List[Event]) -> Dict[str, int]:
+        """Sync the stored alarms with the given events.
+
+        Only rows that were added, changed or removed are written, all in a
+        single transaction, so readers never see a partially updated table.
+
+        Args:
+            events: The complete list of current events
+
+        Returns:
+            dict: Number of "added", "changed" and "removed" rows
+        """
+        cursor: sqlite3.Cursor = self.conn.cursor()
+        cursor.execute(
+            """SELECT event_id, date, start_time, end_time, title, is_system_managed,
+                      start_epoch, end_epoch
+               FROM events"""
+        )
+        stored = {row[0]: row for row in cursor.fetchall()}
 
+        rows = {}
         for event in events:
             # Convert to UTC for storage
             utc_event = event.to_utc()
+            start_epoch = int(utc_event.start_timestamp)
+            end_epoch = int(utc_event.get_end_datetime().timestamp())
+            if end_epoch < start_epoch:  # Ends after midnight UTC
+                end_epoch += 86400
+            rows[utc_event.event_id] = (
+                utc_event.event_id,
+                utc_event.date.strftime("%Y-%m-%d"),
+                utc_event.start_time.strftime("%H:%M:%S"),
+                utc_event.end_time.strftime("%H:%M:%S"),
+                utc_event.title,
+                1 if utc_event.is_system_managed else 0,
+                start_epoch,
+                end_epoch,
+            )
 
-            cursor.execute(
-                """INSERT INTO events 
-                   (event_id, date, start_time, end_time, title, is_system_managed) 
-                   VALUES (?, ?, ?, ?, ?, ?)""",
-                (
-                    utc_event.event_id,
-                    utc_event.date.strftime("%Y-%m-%d"),
-                    utc_event.start_time.strftime("%H:%M:%S"),
-                    utc_event.end_time.strftime("%H:%M:%S"),
-                    utc_event.title,
-                    1 if utc_event.is_system_managed else 0,
-                ),
+        added = [row for event_id, row in rows.items() if event_id not in stored]
+        changed = [
+            row[1:] + row[:1]
+            for event_id, row in rows.items()
+            if event_id in stored and stored[event_id] != row
+        ]
+        removed = [(event_id,) for event_id in stored if event_id not in rows]
+
+        with self.conn:
+            cursor.executemany(
+                """INSERT INTO events
+                   (event_id, date, start_time, end_time, title, is_system_managed,
+                    start_epoch, end_epoch)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                added,
             )
-        self.conn.commit()
+            cursor.executemany(
+                """UPDATE events
+                   SET date = ?, start_time = ?, end_time = ?, title = ?,
+                       is_system_managed = ?, start_epoch = ?, end_epoch = ?
+                   WHERE event_id = ?""",
+                changed,
+            )
+            cursor.executemany("DELETE FROM events WHERE event_id = ?", removed)
+
+        counts = {"added": len(added), "changed": len(changed), "removed": len(removed)}
+        logger.info(
+            "Stored alarms: %d added, %d changed, %d removed",
+            counts["added"],
+            counts["changed"],
+            counts["removed"],
+        )
+        return counts
 
     def get_next_alarm(self) -> Optional[Event]:
         """Get the next upcoming alarm in configured timezone."""
@@ -67,16 +146,17 @@ class sqlManager:
         # Get current time in UTC
         current_time = datetime.now(pytz.UTC)
         current_time = current_time - timedelta(minutes=1)
-        current_datetime = current_time.strftime("%Y-%m-%d %H:%M:%S")
 
+        # Single seek on idx_events_start_epoch
         cursor.execute(
             """
-            SELECT * FROM events 
-            WHERE date || ' ' || start_time >= ? 
-            ORDER BY date || ' ' || start_time 
+            SELECT event_id, date, start_time, end_time, title, is_system_managed
+            FROM events
+            WHERE start_epoch >= ?
+            ORDER BY start_epoch
             LIMIT 1
             """,
-            (current_datetime,),
+            (int(current_time.timestamp()),),
         )
 
         row = cursor.fetchone()
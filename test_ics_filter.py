@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from icalendar import Calendar
+
+from ics_filter import filter_alarm_components
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def read_lines(name):
+    return (FIXTURES / name).read_bytes().splitlines()
+
+
+def test_fold_splitting_multibyte_character():
+    ical_data, _ = filter_alarm_components(read_lines("folded_multibyte.ics"), "Test")
+    summaries = {
+        str(event["UID"]): str(event["SUMMARY"])
+        for event in Calendar.from_ical(ical_data).walk("VEVENT")
+    }
+    assert summaries == {
+        "folded-sun": "Test ☀ wake up",
+        "folded-keyword": "Test split keyword",
+    }
+
+
+def test_declared_charset():
+    lines = [
+        line.replace("à".encode("utf-8"), "à".encode("latin-1"))
+        for line in read_lines("folded_multibyte.ics")
+    ]
+    ical_data, _ = filter_alarm_components(lines, "Lunch", "latin-1")
+    (event,) = Calendar.from_ical(ical_data).walk("VEVENT")
+    assert str(event["SUMMARY"]) == "Lunch à la carte"
@@ -0,0 +1,96 @@
+import time
+
+from notification_server.notify_queue import (
+    TOAST_TITLE,
+    FakeSoundBackend,
+    FakeToastBackend,
+    NotificationQueue,
+)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def make_queue(sound_duration=0.0, **kwargs):
+    toasts = FakeToastBackend()
+    sound = FakeSoundBackend(sound_duration)
+    return NotificationQueue(toasts, sound, **kwargs), toasts, sound
+
+
+def test_coalesce_within_window():
+    queue, toasts, sound = make_queue(coalesce_window=0.2)
+    queue.submit("first")
+    queue.submit("second")
+    wait_for(lambda: queue.get_stats()["shown"] == 1)
+    queue.close()
+    assert toasts.shown == [(TOAST_TITLE, "first\nsecond")]
+    assert sound.played == 1
+
+
+def test_duplicates_shown_once():
+    queue, toasts, sound = make_queue(coalesce_window=0.2)
+    for message in ["wake up", "meeting", "wake up"]:
+        queue.submit(message)
+    wait_for(lambda: queue.get_stats()["shown"] == 1)
+    queue.close()
+    assert toasts.shown == [(TOAST_TITLE, "wake up\nmeeting")]
+    assert queue.get_stats()["received"] == 3
+
+
+def test_messages_during_play_form_next_burst():
+    queue, toasts, sound = make_queue(sound_duration=0.3, coalesce_window=0.05)
+    queue.submit("first")
+    wait_for(lambda: sound.played == 1)
+    queue.submit("second")
+    queue.submit("third")
+    wait_for(lambda: queue.get_stats()["shown"] == 2)
+    queue.close()
+    assert toasts.shown == [(TOAST_TITLE, "first"), (TOAST_TITLE, "second\nthird")]
+    assert sound.played == 2
+
+
+def overflow(policy):
+    """Overfill a queue of two while the consumer is busy playing.
+
+    Returns:
+        tuple: What submit returned for each message, the queue stats and
+            the toasts shown
+    """
+    queue, toasts, sound = make_queue(
+        sound_duration=0.3,
+        coalesce_window=0.01,
+        max_size=2,
+        overflow_policy=policy,
+    )
+    queue.submit("busy")
+    wait_for(lambda: sound.played == 1)
+    accepted = [queue.submit(message) for message in ["one", "two", "three"]]
+    stats = queue.get_stats()
+    wait_for(lambda: queue.get_stats()["shown"] == 2)
+    queue.close()
+    return accepted, stats, toasts.shown[1:]
+
+
+def test_overflow_drop_oldest():
+    accepted, stats, shown = overflow("drop_oldest")
+    assert accepted == [True, True, True]
+    assert (stats["queue_depth"], stats["dropped"], stats["rejected"]) == (2, 1, 0)
+    assert shown == [(TOAST_TITLE, "two\nthree")]
+
+
+def test_overflow_drop_newest():
+    accepted, stats, shown = overflow("drop_newest")
+    assert accepted == [True, True, True]
+    assert (stats["queue_depth"], stats["dropped"], stats["rejected"]) == (2, 1, 0)
+    assert shown == [(TOAST_TITLE, "one\ntwo")]
+
+
+def test_overflow_reject():
+    accepted, stats, shown = overflow("reject")
+    assert accepted == [True, True, False]
+    assert (stats["queue_depth"], stats["dropped"], stats["rejected"]) == (2, 0, 1)
+    assert shown == [(TOAST_TITLE, "one\ntwo")]
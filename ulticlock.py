@@ -1,42 +1,172 @@
-from ical_manager import IcalManager
 from sqlManager import sqlManager
 from config_manager import JsonConfig
-from typing import Optional
-from event import Event
+from typing import TYPE_CHECKING, List
+import argparse
 import logging
+import random
+import signal
+import threading
+import time
 from log_config import setup_logging
 
-# Set up logging first
-setup_logging()
+# ical_manager pulls in requests and the iCalendar libraries, which take
+# seconds to import on a Pi Zero. It is only imported once a sync starts,
+# so reading the next stored alarm doesn't wait for it.
+if TYPE_CHECKING:
+    from ical_manager import IcalManager
 
-# Load config after logging is configured
-config = JsonConfig("ulticlock.config")
 logger = logging.getLogger(__name__)
 
-logger.debug("Starting application with debug level: %s", config.debug_level)
-
-calendar = config.calendars[0]
-ical_manager = IcalManager(calendar, config)
-
-alarms_database = sqlManager(config.database_path, config.timezone)
-next_event = alarms_database.get_next_alarm()
-logger.info("Checking stored events")
-if next_event is not None:
-    logger.info("Next stored event: %s", next_event)
-else:
-    logger.info("No stored events found")
-
-logger.info("Fetching new events from calendar")
-# Fetch and store new events
-parsed_events = ical_manager.fetch_and_parse_events()
-for event in parsed_events:
-    logger.info("Found event: %s", event)
-
-alarms_database.store_alarms(parsed_events)
-logger.info("Checking next alarm after update")
-next_event = alarms_database.get_next_alarm()
-if next_event is not None:
-    logger.info("Next upcoming event: %s", next_event)
-else:
-    logger.info("No upcoming events found")
-alarms_database.close()
+# Daemon mode defaults, overridable in the config
+DEFAULT_SYNC_INTERVAL = 900  # seconds between syncs
+DEFAULT_SYNC_JITTER = 60  # seconds, random spread added to each interval
+DEFAULT_SYNC_RETRY_DELAY = 60  # seconds, doubled per failed sync in a row
+
+
+def report_next_alarm(alarms_database: sqlManager) -> None:
+    """Log the next alarm stored in the database."""
+    next_event = alarms_database.get_next_alarm()
+    logger.info("Checking stored events")
+    if next_event is not None:
+        logger.info("Next stored event: %s", next_event)
+    else:
+        logger.info("No stored events found")
+
+
+def create_ical_managers(config: JsonConfig) -> List["IcalManager"]:
+    """Import the iCalendar stack and create one IcalManager per calendar."""
+    from ical_manager import IcalManager
+
+    return [IcalManager(calendar, config) for calendar in config.calendars]
+
+
+def sync(
+    ical_managers: List["IcalManager"], alarms_database: sqlManager, config: JsonConfig
+) -> bool:
+    """Fetch all calendars and store their alarms.
+
+    Args:
+        ical_managers: One IcalManager per calendar
+        alarms_database: The alarms database
+        config: Application config
+
+    Returns:
+        bool: True if every calendar was fetched, False if any fell back to
+            its cached events
+    """
+    from ical_manager import fetch_all_calendars
+
+    logger.info("Fetching new events from %d calendars", len(ical_managers))
+    # Fetch and store new events
+    parsed_events = fetch_all_calendars(ical_managers, config)
+    for event in parsed_events:
+        logger.info("Found event: %s", event)
+
+    alarms_database.store_alarms(parsed_events)
+    logger.info("Checking next alarm after update")
+    next_event = alarms_database.get_next_alarm()
+    if next_event is not None:
+        logger.info("Next upcoming event: %s", next_event)
+    else:
+        logger.info("No upcoming events found")
+    return all(manager.consecutive_failures == 0 for manager in ical_managers)
+
+
+def run_daemon(
+    ical_managers: List["IcalManager"], alarms_database: sqlManager, config: JsonConfig
+) -> None:
+    """Sync on an interval until SIGTERM or SIGINT.
+
+    Config, HTTP sessions, calendar caches and the database connection stay
+    open between syncs. After a failed sync the next one is attempted
+    sooner, backing off exponentially up to the normal interval. SIGHUP
+    starts a sync right away.
+
+    Args:
+        ical_managers: One IcalManager per calendar
+        alarms_database: The alarms database
+        config: Application config (sync_interval, sync_jitter,
+            sync_retry_delay)
+    """
+    interval = getattr(config, "sync_interval", DEFAULT_SYNC_INTERVAL)
+    jitter = getattr(config, "sync_jitter", DEFAULT_SYNC_JITTER)
+    retry_delay = getattr(config, "sync_retry_delay", DEFAULT_SYNC_RETRY_DELAY)
+
+    stop = threading.Event()
+    wake = threading.Event()
+
+    def handle_stop(signum, frame):
+        logger.info("Received %s, stopping", signal.Signals(signum).name)
+        stop.set()
+        wake.set()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+    signal.signal(signal.SIGHUP, lambda signum, frame: wake.set())
+
+    failures = 0
+    while not stop.is_set():
+        start = time.monotonic()
+        try:
+            report_next_alarm(alarms_database)
+            ok = sync(ical_managers, alarms_database, config)
+        except Exception as e:
+            logger.error("Sync failed: %s", e, exc_info=True)
+            ok = False
+        failures = 0 if ok else failures + 1
+        logger.info("Sync took %.2fs", time.monotonic() - start)
+
+        delay = interval
+        if failures:
+            delay = min(interval, retry_delay * 2 ** (failures - 1))
+            logger.warning("Sync incomplete %d times in a row", failures)
+        delay = max(0, delay + random.uniform(-jitter, jitter))
+        logger.debug("Next sync in %.0fs", delay)
+        wake.wait(delay)
+        wake.clear()
+    logger.info("Daemon stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sync calendar alarms")
+    parser.add_argument(
+        "--config", default="ulticlock.config", help="Path to the config file"
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep running and sync every sync_interval seconds",
+    )
+    mode.add_argument(
+        "--next",
+        action="store_true",
+        help="Only report the next stored alarm, without syncing",
+    )
+    args = parser.parse_args()
+
+    # Load the config once and set up logging from it
+    config = JsonConfig(args.config)
+    setup_logging(config)
+    logger.debug("Starting application with debug level: %s", config.debug_level)
+
+    alarms_database = sqlManager(config.database_path, config.timezone)
+    ical_managers = []
+    try:
+        if not args.daemon:
+            report_next_alarm(alarms_database)
+        if args.next:
+            return
+        ical_managers = create_ical_managers(config)
+        if args.daemon:
+            run_daemon(ical_managers, alarms_database, config)
+        else:
+            sync(ical_managers, alarms_database, config)
+    finally:
+        for manager in ical_managers:
+            manager.close()
+        alarms_database.close()
+
+
+if __name__ == "__main__":
+    main()